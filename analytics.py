@@ -0,0 +1,221 @@
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # the analytics page says numpy is needed
+    np = None
+
+from match_journal import JOURNAL_PATH
+from metrics import metrics
+from ratings import match_result
+from utils import data_version, get_matches
+
+ANALYTICS_AVAILABLE = np is not None
+
+# Rows of the team table shown on the analytics page
+TEAM_TABLE_ROWS = 100
+
+# Most-played pairings listed as rivalries
+RIVALRY_ROWS = 10
+
+_stats_cache = {"stamp": None, "stats": None}
+_stats_cache_lock = threading.Lock()
+
+
+def _score(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _per_team(index, weights, n):
+    """Sum weights by team, for both the team1 and team2 columns."""
+    team1, team2 = index
+    return (np.bincount(team1, weights=weights[0], minlength=n)
+            + np.bincount(team2, weights=weights[1], minlength=n))
+
+
+def compute_stats(matches):
+    """
+    Per-team, head-to-head, per-tournament and per-round aggregates of all results.
+
+    Match history is loaded once into arrays (team indexes, scores, result,
+    tournament, round); every aggregate is then a bincount or unique over
+    those arrays, with no Python loop per match.
+    """
+    played_matches = [m for m in matches if match_result(m)]
+    team_ids = sorted({m[key] for m in played_matches for key in ("team1_id", "team2_id")})
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+    tournament_ids = sorted({m["tournament_id"] for m in played_matches})
+    tournament_index = {tournament_id: i for i, tournament_id in enumerate(tournament_ids)}
+    count, n = len(played_matches), len(team_ids)
+
+    t1 = np.fromiter((team_index[m["team1_id"]] for m in played_matches), dtype=np.int64, count=count)
+    t2 = np.fromiter((team_index[m["team2_id"]] for m in played_matches), dtype=np.int64, count=count)
+    s1 = np.fromiter((_score(m["team1_score"]) for m in played_matches), dtype=np.float64, count=count)
+    s2 = np.fromiter((_score(m["team2_score"]) for m in played_matches), dtype=np.float64, count=count)
+    # team1's result: 1 won, 0 lost, 0.5 drawn
+    result = np.fromiter((match_result(m)[2] for m in played_matches), dtype=np.float64, count=count)
+    tournament = np.fromiter((tournament_index[m["tournament_id"]] for m in played_matches),
+                             dtype=np.int64, count=count)
+    round_number = np.fromiter((int(m["round"]) if m["round"].isdigit() else 0 for m in played_matches),
+                               dtype=np.int64, count=count)
+
+    # Points only count where both scores were recorded
+    scored = ~np.isnan(s1) & ~np.isnan(s2)
+    p1, p2 = np.where(scored, s1, 0.0), np.where(scored, s2, 0.0)
+    won1, won2, drawn = result == 1.0, result == 0.0, result == 0.5
+
+    sides = (t1, t2)
+    played = _per_team(sides, (np.ones(count), np.ones(count)), n)
+    wins = _per_team(sides, (won1, won2), n)
+    draws = _per_team(sides, (drawn, drawn), n)
+    scored_games = _per_team(sides, (scored, scored), n)
+    points_for = _per_team(sides, (p1, p2), n)
+    points_against = _per_team(sides, (p2, p1), n)
+
+    def ratio(numerator, denominator):
+        return np.divide(numerator, denominator, out=np.full(len(numerator), np.nan),
+                         where=denominator > 0)
+
+    # Head-to-head over the pairs that actually met; an n x n matrix would
+    # not fit in memory at league scale
+    low, high = np.minimum(t1, t2), np.maximum(t1, t2)
+    low_is_team1 = low == t1
+    pair_keys, pair = np.unique(low * max(n, 1) + high, return_inverse=True)
+    pairs = {
+        "low": pair_keys // max(n, 1),
+        "high": pair_keys % max(n, 1),
+        "played": np.bincount(pair),
+        "low_wins": np.bincount(pair, weights=np.where(low_is_team1, won1, won2)),
+        "high_wins": np.bincount(pair, weights=np.where(low_is_team1, won2, won1)),
+        "draws": np.bincount(pair, weights=drawn),
+        "low_points": np.bincount(pair, weights=np.where(low_is_team1, p1, p2)),
+        "high_points": np.bincount(pair, weights=np.where(low_is_team1, p2, p1)),
+    }
+
+    margin = np.abs(p1 - p2)
+    tournament_scored = np.bincount(tournament, weights=scored, minlength=len(tournament_ids))
+    rounds = np.arange(round_number.max() + 1 if count else 0)
+    round_scored = np.bincount(round_number, weights=scored, minlength=len(rounds))
+
+    return {
+        "team_ids": team_ids,
+        "played": played,
+        "wins": wins,
+        "losses": played - wins - draws,
+        "draws": draws,
+        "win_rate": ratio(wins + 0.5 * draws, played),
+        "avg_for": ratio(points_for, scored_games),
+        "avg_against": ratio(points_against, scored_games),
+        "pairs": pairs,
+        "tournament_ids": tournament_ids,
+        "tournament_matches": np.bincount(tournament, minlength=len(tournament_ids)),
+        "tournament_avg_points": ratio(np.bincount(tournament, weights=p1 + p2, minlength=len(tournament_ids)),
+                                       tournament_scored),
+        "tournament_avg_margin": ratio(np.bincount(tournament, weights=margin, minlength=len(tournament_ids)),
+                                       tournament_scored),
+        "round_avg_margin": ratio(np.bincount(round_number, weights=margin, minlength=len(rounds)),
+                                  round_scored),
+        "matches": count,
+    }
+
+
+def get_stats():
+    """Aggregates of all results, recomputed only when the data files change."""
+    stamp = data_version("data/tournaments.csv", "data/matches.csv", "data/teams.csv", JOURNAL_PATH)
+    with _stats_cache_lock:
+        hit = _stats_cache["stamp"] == stamp
+        metrics.record_cache("analytics", hit)
+        if not hit:
+            _stats_cache["stats"] = compute_stats(get_matches())
+            _stats_cache["stamp"] = stamp
+        return _stats_cache["stats"]
+
+
+def _number(value, digits=1):
+    """Round for display; NaN (no data) becomes None."""
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def team_table(stats, names, limit=TEAM_TABLE_ROWS):
+    """Best teams by win rate (then games played), as template-ready rows."""
+    order = np.lexsort((-stats["played"], -np.nan_to_num(stats["win_rate"], nan=-1)))[:limit]
+    return [{
+        "team_id": stats["team_ids"][i],
+        "name": names.get(stats["team_ids"][i], f"Team {stats['team_ids'][i]}"),
+        "played": int(stats["played"][i]),
+        "wins": int(stats["wins"][i]),
+        "losses": int(stats["losses"][i]),
+        "draws": int(stats["draws"][i]),
+        "win_rate": _number(stats["win_rate"][i] * 100),
+        "avg_for": _number(stats["avg_for"][i]),
+        "avg_against": _number(stats["avg_against"][i]),
+    } for i in order.tolist()]
+
+
+def head_to_head(stats, team_id, names):
+    """One team's record against every opponent it has met, most played first."""
+    try:
+        i = stats["team_ids"].index(team_id)
+    except ValueError:
+        return []
+    pairs = stats["pairs"]
+    selected = np.flatnonzero((pairs["low"] == i) | (pairs["high"] == i))
+    is_low = pairs["low"][selected] == i
+    opponents = np.where(is_low, pairs["high"][selected], pairs["low"][selected])
+    wins = np.where(is_low, pairs["low_wins"][selected], pairs["high_wins"][selected])
+    losses = np.where(is_low, pairs["high_wins"][selected], pairs["low_wins"][selected])
+    points_for = np.where(is_low, pairs["low_points"][selected], pairs["high_points"][selected])
+    points_against = np.where(is_low, pairs["high_points"][selected], pairs["low_points"][selected])
+    played = pairs["played"][selected]
+
+    order = np.argsort(-played, kind="stable")
+    return [{
+        "team_id": stats["team_ids"][opponents[k]],
+        "name": names.get(stats["team_ids"][opponents[k]], f"Team {stats['team_ids'][opponents[k]]}"),
+        "played": int(played[k]),
+        "wins": int(wins[k]),
+        "losses": int(losses[k]),
+        "draws": int(pairs["draws"][selected][k]),
+        "points_for": int(points_for[k]),
+        "points_against": int(points_against[k]),
+    } for k in order.tolist()]
+
+
+def rivalries(stats, names, limit=RIVALRY_ROWS):
+    """The most played pairings and their records."""
+    pairs = stats["pairs"]
+    order = np.argsort(-pairs["played"], kind="stable")[:limit]
+    rows = []
+    for k in order.tolist():
+        low, high = stats["team_ids"][pairs["low"][k]], stats["team_ids"][pairs["high"][k]]
+        rows.append({
+            "team1": names.get(low, f"Team {low}"),
+            "team2": names.get(high, f"Team {high}"),
+            "played": int(pairs["played"][k]),
+            "team1_wins": int(pairs["low_wins"][k]),
+            "team2_wins": int(pairs["high_wins"][k]),
+            "draws": int(pairs["draws"][k]),
+        })
+    return rows
+
+
+def chart_data(stats, tournaments):
+    """Series for the page's charts: per tournament in date order, and per round."""
+    created = {t["id"]: (t.get("created_at", ""), t.get("name", t["id"])) for t in tournaments}
+    order = sorted(range(len(stats["tournament_ids"])),
+                   key=lambda i: created.get(stats["tournament_ids"][i], ("", ""))[0])
+    return {
+        "tournaments": {
+            "labels": [created.get(stats["tournament_ids"][i], ("", stats["tournament_ids"][i]))[1]
+                       for i in order],
+            "avg_points": [_number(stats["tournament_avg_points"][i]) for i in order],
+            "avg_margin": [_number(stats["tournament_avg_margin"][i]) for i in order],
+        },
+        "rounds": {
+            "labels": [f"Round {r}" for r in range(1, len(stats["round_avg_margin"]))],
+            "avg_margin": [_number(value) for value in stats["round_avg_margin"][1:]],
+        },
+    }
@@ -1,5 +1,4 @@
 import os
-import logging
 import csv
 import secrets
 import hashlib
@@ -13,18 +12,38 @@ from flask_wtf import CSRFProtect
 from flask_wtf.csrf import CSRFError
 from dotenv import load_dotenv
 
+# Load .env before the modules below, some of which read settings at import
+load_dotenv(verbose=True)  # Added verbose=True to see debug output
 
 from utils import (
-    check_data_dir, read_csv, write_csv, get_participants, get_teams, 
-    get_tournaments, get_matches, generate_tournament_bracket, 
-    get_team_by_id, get_participant_by_id, get_tournament_by_id, get_match_by_id
+    read_csv, write_csv, append_csv, get_participants, get_teams, 
+    get_tournaments, generate_tournament_bracket, 
+    get_team_by_id, get_participant_by_id, get_tournament_by_id, get_match_by_id,
+    get_tournament_matches, get_tournament_matches_as_of, record_match_events,
+    get_match_history, get_tournaments_page, get_table_counts, table_index, TOURNAMENT_STATUSES,
+    index_by_id, group_participants_by_team, normalize_name,
+    find_participant_by_name, find_team_by_name, search_participants, search_teams,
+    get_team_ratings, init_journal_compaction
+)
+from structured_logging import configure_logging, init_logging
+from compression import init_compression, compression_cache
+from metrics import init_metrics, metrics, prometheus_text
+from profiler import (
+    init_profiler, load_settings as load_profiler_settings, save_settings as save_profiler_settings,
+    list_profiles, profile_path, collapsed_stacks, profile_summary
 )
+from backups import init_backups
+from schema import init_schema, TABLE_HEADERS
+from id_allocator import next_id
+from csv_import import import_csv, CsvImportError
+from csv_export import open_snapshot, snapshot_size, stream_file, stream_zip, EXPORT_TABLES
+from bracket_layout import compute_bracket_layout, get_bracket_svg
+from analytics import ANALYTICS_AVAILABLE, get_stats, team_table, head_to_head, rivalries, chart_data
+from simulator import get_odds, odds_table, request_simulation
+from teammate_matching import MATCHING_STRATEGIES, matching_preview, apply_pairs
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
-
-# Ensure .env file is loaded
-load_dotenv(verbose=True)  # Added verbose=True to see debug output
+# JSON log lines written by a background thread (levels via LOG_LEVEL/LOG_LEVELS)
+configure_logging()
 
 # Create Flask app
 app = Flask(__name__)
@@ -33,8 +52,26 @@ app.secret_key = os.environ.get("SESSION_SECRET", secrets.token_hex(16))
 # Initialize CSRF protection
 csrf = CSRFProtect(app)
 
-# Ensure data directory and CSV files exist
-check_data_dir()
+# Request ids and one access line per request; registered first so the
+# logged duration covers every other hook
+init_logging(app)
+
+# Per-endpoint latency and storage I/O; registered next so its timing
+# includes the compression hook below
+init_metrics(app)
+
+# Opt-in cProfile of sampled requests (switched on from /admin/profiler)
+init_profiler(app)
+
+# Compress HTML and JSON responses (level configurable via COMPRESS_LEVEL)
+init_compression(app)
+init_backups(app)
+
+# Compacts the match journal on age even when no scores are being entered
+init_journal_compaction(app)
+
+# Only a version check here; pending migrations run before the first request
+init_schema(app)
 
 # Add context processor to make variables available to all templates
 @app.context_processor
@@ -49,6 +86,21 @@ ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD")
 if not ADMIN_USERNAME or not ADMIN_PASSWORD:
     raise ValueError("Admin credentials not found in environment variables. Check your .env file.")
 
+# Bearer token a Prometheus scraper sends for /metrics; unset, only admins can read it
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+
+# Page sizes for tournament and team listings
+TOURNAMENTS_PER_PAGE = 24
+DASHBOARD_RECENT_LIMIT = 10
+
+# Row errors listed in the flash message after a CSV upload
+UPLOAD_ERRORS_SHOWN = 10
+
+# Result limits for the autocomplete search endpoints
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
 
 # Add this context processor to make tournaments available in all templates
 @app.context_processor
@@ -58,9 +110,8 @@ def inject_tournaments():
     try:
         # Only try to get tournaments if the data directory is set up
         if os.path.exists("data/tournaments.csv"):
-            tournaments = get_tournaments()
-            # Sort by creation date (most recent first)
-            tournaments.sort(key=lambda t: t.get("created_at", ""), reverse=True)
+            # Most recent first, straight from the created_at index
+            tournaments, _ = get_tournaments_page(limit=10)
     except:
         # If there's an error, just return an empty list
         pass
@@ -126,21 +177,17 @@ def register():
         teams = get_teams()
         
         # Check if the primary participant already exists
-        for participant in participants:
-            if participant["first_name"].lower() == first_name.lower() and participant["last_name"].lower() == last_name.lower():
-                flash(f"{first_name} {last_name} is already registered. If this is you, please use a different name or contact the administrator.", "danger")
-                return redirect(url_for("register"))
+        if find_participant_by_name(first_name, last_name):
+            flash(f"{first_name} {last_name} is already registered. If this is you, please use a different name or contact the administrator.", "danger")
+            return redirect(url_for("register"))
         
         # Check or create team
-        team_id = None
-        for team in teams:
-            if team["name"].lower() == team_name.lower():
-                team_id = team["id"]
-                break
+        existing_team = find_team_by_name(team_name)
+        team_id = existing_team["id"] if existing_team else None
         
         if team_id is None:
             # Create new team
-            team_id = str(len(teams) + 1)
+            team_id = next_id("teams")
             team = {
                 "id": team_id,
                 "name": team_name,
@@ -150,7 +197,7 @@ def register():
             write_csv("data/teams.csv", teams)
         
         # Add the primary participant
-        participant_id = str(len(participants) + 1)
+        participant_id = next_id("participants")
         participant = {
             "id": participant_id,
             "first_name": first_name,
@@ -185,14 +232,14 @@ def register():
                 flash("Teammate details are incomplete", "danger")
                 return redirect(url_for("register"))
                 
-            # Check if the teammate already exists
-            for p in participants:
-                if p["first_name"].lower() == teammate_first_name.lower() and p["last_name"].lower() == teammate_last_name.lower():
-                    flash(f"{teammate_first_name} {teammate_last_name} is already registered.", "danger")
-                    return redirect(url_for("register"))
+            # Check if the teammate already exists (or is the person registering)
+            teammate_key = normalize_name(teammate_first_name, teammate_last_name)
+            if find_participant_by_name(teammate_first_name, teammate_last_name) or teammate_key == normalize_name(first_name, last_name):
+                flash(f"{teammate_first_name} {teammate_last_name} is already registered.", "danger")
+                return redirect(url_for("register"))
             
             # Add the teammate
-            teammate_id = str(len(participants) + 1)
+            teammate_id = next_id("participants")
             teammate = {
                 "id": teammate_id,
                 "first_name": teammate_first_name,
@@ -216,14 +263,32 @@ def register():
         write_csv("data/participants.csv", participants)
         return redirect(url_for("index"))
     
-    # For GET request, prepare data for the form
-    available_teammates = []
-    participants = get_participants()
-    for participant in participants:
-        if participant.get("needs_teammate", True) and not participant.get("team_id"):
-            available_teammates.append(participant)
+    # Available teammates are looked up as the user types via /api/participants/search
+    return render_template("register.html")
+
+def _search_limit():
+    """Result limit for search endpoints, clamped to a sane range."""
+    try:
+        limit = int(request.args.get("limit", SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        limit = SEARCH_DEFAULT_LIMIT
+    return max(1, min(limit, SEARCH_MAX_LIMIT))
+
+@app.route("/api/participants/search")
+def participant_search():
+    """Prefix search over participant names for autocomplete."""
+    query = request.args.get("q", "")
+    is_admin = session.get("admin_logged_in", False)
+    # The public registration form may only see participants without a team
+    available_only = not is_admin or request.args.get("available") == "1"
     
-    return render_template("register.html", available_teammates=available_teammates)
+    return jsonify({"results": search_participants(query, limit=_search_limit(), available_only=available_only)})
+
+@app.route("/api/teams/search")
+def team_search():
+    """Prefix search over team names for autocomplete."""
+    query = request.args.get("q", "")
+    return jsonify({"results": search_teams(query, limit=_search_limit())})
 
 @app.route("/update-team-name", methods=["GET", "POST"])
 def update_team_name():
@@ -285,14 +350,13 @@ def update_team_name():
         team_id = None
         
         # Check if team with this name already exists
-        for team in teams:
-            if team["name"].lower() == new_team_name.lower():
-                team_id = team["id"]
-                break
+        existing_team = find_team_by_name(new_team_name)
+        if existing_team:
+            team_id = existing_team["id"]
         
         # Create new team if it doesn't exist
         if team_id is None:
-            team_id = str(len(teams) + 1)
+            team_id = next_id("teams")
             team = {
                 "id": team_id,
                 "name": new_team_name,
@@ -321,15 +385,21 @@ def update_success():
 # Add a route for all tournaments view
 @app.route("/tournaments")
 def all_tournaments():
-    """Show all available tournaments."""
-    tournaments = get_tournaments()
+    """Show all available tournaments, most recent first, one page at a time."""
+    status = request.args.get("status")
+    if status not in TOURNAMENT_STATUSES:
+        status = None
+    cursor = request.args.get("cursor")
     
-    # Sort by creation date (most recent first)
-    tournaments.sort(key=lambda t: t.get("created_at", ""), reverse=True)
+    tournaments, next_cursor = get_tournaments_page(status=status, cursor=cursor, limit=TOURNAMENTS_PER_PAGE)
     
     return render_template(
         "all_tournaments.html",
-        tournaments=tournaments
+        tournaments=tournaments,
+        status=status,
+        statuses=TOURNAMENT_STATUSES,
+        cursor=cursor,
+        next_cursor=next_cursor
     )
 
 @app.route("/admin/login", methods=["GET", "POST"])
@@ -346,6 +416,7 @@ def admin_login():
         
         if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
             session["admin_logged_in"] = True
+            session["admin_username"] = username
             flash("You have been logged in as admin.", "success")
             return redirect(url_for("admin_dashboard"))
         else:
@@ -357,6 +428,7 @@ def admin_login():
 def admin_logout():
     """Admin logout route."""
     session.pop("admin_logged_in", None)
+    session.pop("admin_username", None)
     flash("You have been logged out.", "success")
     return redirect(url_for("index"))
 
@@ -364,18 +436,29 @@ def admin_logout():
 @admin_required
 def admin_dashboard():
     """Admin dashboard showing tournament and registration overview."""
-    participants = get_participants()
-    teams = get_teams()
-    tournaments = get_tournaments()
+    counts = get_table_counts()
+    tournaments, _ = get_tournaments_page(limit=DASHBOARD_RECENT_LIMIT)
+    
+    # Most recently registered teams, from a cached created_at ordering
+    recent_teams = table_index(
+        "data/teams.csv", "recent",
+        lambda rows: sorted(rows, key=lambda t: (t.get("created_at", ""), t.get("id", "")), reverse=True)
+    )[:DASHBOARD_RECENT_LIMIT]
+    teams = [dict(team) for team in recent_teams]
+    
+    # Members of the listed teams only, from a grouping cached per table version
+    members_by_team = table_index("data/participants.csv", "by_team", group_participants_by_team)
+    team_members = {team["id"]: members_by_team.get(team["id"], []) for team in teams}
     
     return render_template(
         "admin_dashboard.html",
-        participants=participants,
         teams=teams,
+        team_members=team_members,
         tournaments=tournaments,
-        participants_count=len(participants),
-        teams_count=len(teams),
-        tournaments_count=len(tournaments)
+        participants_count=counts["participants"],
+        teams_count=counts["teams"],
+        tournaments_count=counts["tournaments"],
+        tournament_status_counts=counts["tournaments_by_status"]
     )
 
 @app.route("/admin/teams", methods=["GET", "POST"])
@@ -395,13 +478,12 @@ def team_management():
                 return redirect(url_for("team_management"))
             
             # Check if team already exists
-            for team in teams:
-                if team["name"].lower() == team_name.lower():
-                    flash(f"Team '{team_name}' already exists", "danger")
-                    return redirect(url_for("team_management"))
+            if find_team_by_name(team_name):
+                flash(f"Team '{team_name}' already exists", "danger")
+                return redirect(url_for("team_management"))
             
             # Create new team
-            team_id = str(len(teams) + 1) if teams else "1"
+            team_id = next_id("teams")
             team = {
                 "id": team_id,
                 "name": team_name,
@@ -506,17 +588,17 @@ def team_management():
     # Create a lookup dict of team names by ID for easier display
     team_dict = {team["id"]: team["name"] for team in teams}
     
-    # Group participants by team
+    # Group participants by team in one pass
+    members_by_team = group_participants_by_team(participants)
     teams_with_participants = []
     for team in teams:
-        team_participants = [p for p in participants if p["team_id"] == team["id"]]
         teams_with_participants.append({
             "team": team,
-            "participants": team_participants
+            "participants": members_by_team.get(team["id"], [])
         })
     
     # Get participants without a team
-    unassigned_participants = [p for p in participants if not p["team_id"] or p["team_id"] == ""]
+    unassigned_participants = members_by_team.get("", [])
     
     return render_template(
         "team_management.html",
@@ -527,6 +609,37 @@ def team_management():
         team_dict=team_dict
     )
 
+@app.route("/admin/teams/match", methods=["GET", "POST"])
+@admin_required
+def teammate_matching():
+    """Pair up everyone waiting for a teammate in one pass."""
+    if request.method == "POST":
+        # Apply exactly the pairs that were previewed
+        pair_ids = [value.split(",") for value in request.form.getlist("pair")]
+        applied, created, removed = apply_pairs(pair_ids)
+        if applied:
+            flash(f"Matched {applied} pair(s): {created} team(s) created, {removed} empty team(s) removed", "success")
+        else:
+            flash("No pairs were applied; the participants may have been matched already", "warning")
+        return redirect(url_for("teammate_matching"))
+    
+    strategy = request.args.get("strategy", "random")
+    if strategy not in MATCHING_STRATEGIES:
+        strategy = "random"
+    keep_apart = request.args.get("keep_apart", "")
+    preview = matching_preview(strategy, keep_apart)
+    
+    team_dict = {team["id"]: team["name"] for team in get_teams()}
+    
+    return render_template(
+        "teammate_matching.html",
+        strategies=MATCHING_STRATEGIES,
+        strategy=strategy,
+        keep_apart=keep_apart,
+        team_dict=team_dict,
+        **preview
+    )
+
 @app.route("/admin/team-names", methods=["GET", "POST"])
 @admin_required
 def team_name_management():
@@ -535,12 +648,13 @@ def team_name_management():
     teams = get_teams()
     
     # Filter participants with TBD team names
+    teams_by_id = index_by_id(teams)
     tbd_participants = []
     for participant in participants:
         # Find the team for this participant
         team = None
         if participant["team_id"]:
-            team = next((t for t in teams if t["id"] == participant["team_id"]), None)
+            team = teams_by_id.get(participant["team_id"])
         
         # If the participant has no team or team name is TBD, add to the list
         if not team or (team and team["name"] == "TBD"):
@@ -574,7 +688,7 @@ def team_name_management():
                 participant["team_id"] = team_id
                 
                 # Get team name for confirmation message
-                team_name = next((t["name"] for t in teams if t["id"] == team_id), "Unknown")
+                team_name = teams_by_id[team_id]["name"] if team_id in teams_by_id else "Unknown"
                 flash(f"Participant assigned to existing team '{team_name}'", "success")
             else:
                 team_name = request.form.get("team_name")
@@ -583,7 +697,7 @@ def team_name_management():
                     return redirect(url_for("team_name_management"))
                 
                 # Check if a team with this name already exists
-                existing_team = next((t for t in teams if t["name"].lower() == team_name.lower()), None)
+                existing_team = find_team_by_name(team_name)
                 
                 if existing_team:
                     # Use existing team
@@ -591,7 +705,7 @@ def team_name_management():
                     flash(f"Participant assigned to existing team '{team_name}'", "success")
                 else:
                     # Create new team
-                    team_id = str(len(teams) + 1)
+                    team_id = next_id("teams")
                     team = {
                         "id": team_id,
                         "name": team_name,
@@ -648,8 +762,7 @@ def team_name_management():
     
     return render_template(
         "team_name_management.html",
-        tbd_participants=tbd_participants,
-        teams=teams
+        tbd_participants=tbd_participants
     )
 
 @app.route("/admin/tournament/new", methods=["GET", "POST"])
@@ -657,13 +770,13 @@ def team_name_management():
 def tournament_config():
     """Tournament configuration page."""
     teams = get_teams()
-    tournaments = get_tournaments()
     participants = get_participants()
     
     # Filter to show only teams with at least one member
+    members_by_team = group_participants_by_team(participants)
     valid_teams = []
     for team in teams:
-        team_members = [p for p in participants if p["team_id"] == team["id"]]
+        team_members = members_by_team.get(team["id"])
         if team_members:
             # Add member count to team object for display
             team_copy = team.copy()
@@ -680,7 +793,7 @@ def tournament_config():
             return redirect(url_for("tournament_config"))
         
         # Create new tournament
-        tournament_id = str(len(tournaments) + 1)
+        tournament_id = next_id("tournaments")
         tournament = {
             "id": tournament_id,
             "name": tournament_name,
@@ -688,14 +801,16 @@ def tournament_config():
             "status": "pending",  # pending, active, completed
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        tournaments.append(tournament)
-        write_csv("data/tournaments.csv", tournaments)
+        append_csv("data/tournaments.csv", [tournament])
+        
+        # Seed by rating unless a random draw was asked for
+        ratings = None
+        if request.form.get("seeding", "rating") == "rating":
+            ratings = {team_id: team["rating"] for team_id, team in get_team_ratings().items()}
         
-        # Generate tournament bracket
-        matches = get_matches()
-        new_matches = generate_tournament_bracket(tournament_id, tournament_type, selected_teams)
-        matches.extend(new_matches)
-        write_csv("data/matches.csv", matches)
+        # Generate tournament bracket; only the new rows are written
+        new_matches = generate_tournament_bracket(tournament_id, tournament_type, selected_teams, ratings)
+        append_csv("data/matches.csv", new_matches)
         
         flash(f"Tournament '{tournament_name}' created successfully", "success")
         return redirect(url_for("tournament_view", tournament_id=tournament_id))
@@ -714,8 +829,12 @@ def tournament_view(tournament_id):
         flash("Tournament not found", "danger")
         return redirect(url_for("admin_dashboard"))
     
-    matches = get_matches()
-    tournament_matches = [m for m in matches if m["tournament_id"] == tournament_id]
+    # ?as_of=<event number> shows the bracket as it was after that change
+    as_of = request.args.get("as_of", type=int)
+    if as_of is not None:
+        tournament_matches = get_tournament_matches_as_of(tournament_id, as_of)
+    else:
+        tournament_matches = get_tournament_matches(tournament_id)
     
     # Group matches by round
     rounds = {}
@@ -731,11 +850,16 @@ def tournament_view(tournament_id):
     teams = get_teams()
     team_dict = {team["id"]: team["name"] for team in teams}
     
+    # Card positions and connector paths, drawn client-side in one pass
+    layout = compute_bracket_layout(tournament_matches, card_height=170)
+    
     return render_template(
         "tournament_view.html",
         tournament=tournament,
         rounds=sorted_rounds,
-        team_dict=team_dict
+        team_dict=team_dict,
+        layout=layout,
+        as_of=as_of
     )
 
 @app.route("/admin/match/<match_id>", methods=["GET", "POST"])
@@ -768,41 +892,40 @@ def match_view(match_id):
             flash("Scores must be numbers", "danger")
             return redirect(url_for("match_view", match_id=match_id))
         
-        # Update match with scores
-        matches = get_matches()
-        for m in matches:
-            if m["id"] == match_id:
-                m["team1_score"] = str(team1_score)
-                m["team2_score"] = str(team2_score)
-                m["status"] = "completed"
-                
-                # Determine winner
-                if team1_score > team2_score:
-                    m["winner_id"] = m["team1_id"]
-                elif team2_score > team1_score:
-                    m["winner_id"] = m["team2_id"]
-                else:
-                    m["winner_id"] = ""  # Tie
-                
-                # Update next match if applicable
-                if m["next_match_id"]:
-                    next_match = next((nm for nm in matches if nm["id"] == m["next_match_id"]), None)
-                    if next_match:
-                        # Determine if this is the first or second team in next match
-                        if m["next_match_position"] == "1":
-                            next_match["team1_id"] = m["winner_id"]
-                        else:
-                            next_match["team2_id"] = m["winner_id"]
-                
-                flash(f"Match scores updated successfully", "success")
-                break
+        # Determine winner
+        if team1_score > team2_score:
+            winner_id = match["team1_id"]
+        elif team2_score > team1_score:
+            winner_id = match["team2_id"]
+        else:
+            winner_id = ""  # Tie
         
-        write_csv("data/matches.csv", matches)
+        # Record the result as journal events rather than rewriting matches.csv
+        events = [(
+            "correction" if match["status"] == "completed" else "score_set",
+            match_id,
+            {
+                "team1_score": str(team1_score),
+                "team2_score": str(team2_score),
+                "status": "completed",
+                "winner_id": winner_id
+            }
+        )]
+        
+        # Update next match if applicable
+        if match["next_match_id"]:
+            # Determine if this is the first or second team in next match
+            slot = "team1_id" if match["next_match_position"] == "1" else "team2_id"
+            events.append(("winner_advanced", match["next_match_id"], {slot: winner_id}))
+        
+        record_match_events(events, by=session.get("admin_username", ""))
+        request_simulation(match["tournament_id"])
+        flash(f"Match scores updated successfully", "success")
         
         # Check if this is the final match and update tournament status if needed
         tournament = get_tournament_by_id(match["tournament_id"])
         if tournament:
-            tournament_matches = [m for m in matches if m["tournament_id"] == match["tournament_id"]]
+            tournament_matches = get_tournament_matches(match["tournament_id"])
             all_completed = all(m["status"] == "completed" for m in tournament_matches)
             
             if all_completed:
@@ -821,124 +944,97 @@ def match_view(match_id):
         match=match,
         team1=team1,
         team2=team2,
-        team_dict=team_dict
+        team_dict=team_dict,
+        history=get_match_history(match_id)
+    )
+
+@app.route("/admin/ratings")
+@admin_required
+def admin_ratings():
+    """Elo ratings of all teams, strongest first."""
+    ratings = get_team_ratings()
+    team_dict = {team["id"]: team["name"] for team in get_teams()}
+    
+    rows = [
+        dict(team, team_id=team_id, name=team_dict.get(team_id, f"Team {team_id}"))
+        for team_id, team in ratings.items()
+    ]
+    rows.sort(key=lambda row: row["rating"], reverse=True)
+    
+    return render_template("admin_ratings.html", rows=rows)
+
+@app.route("/admin/analytics")
+@admin_required
+def admin_analytics():
+    """Win rates, head-to-head records and score trends over all results."""
+    if not ANALYTICS_AVAILABLE:
+        return render_template("admin_analytics.html", available=False)
+    
+    stats = get_stats()
+    team_dict = {team["id"]: team["name"] for team in get_teams()}
+    team_id = request.args.get("team", "")
+    
+    return render_template(
+        "admin_analytics.html",
+        available=True,
+        match_count=stats["matches"],
+        teams=team_table(stats, team_dict),
+        rivalries=rivalries(stats, team_dict),
+        charts=chart_data(stats, get_tournaments()),
+        selected_team=team_dict.get(team_id, f"Team {team_id}") if team_id else None,
+        head_to_head=head_to_head(stats, team_id, team_dict) if team_id else []
     )
 
 @app.route("/admin/csv-upload", methods=["GET", "POST"])
 @admin_required
 def admin_csv_upload():
     if request.method == "POST":
-        participants_file = request.files.get('participants_csv')
-        teams_file = request.files.get('teams_csv')
+        import_mode = request.form.get("import_mode", "replace")
+        import_key = request.form.get("import_key", "id")
         action_taken = False
+        files_selected = False
+
+        for table in ["participants", "teams"]:
+            upload = request.files.get(f"{table}_csv")
+            if not upload or upload.filename == '':
+                continue
+            files_selected = True
+            label = table.capitalize()
 
-        if participants_file and participants_file.filename != '':
-            try:
-                # Save the file to a temporary location
-                import tempfile
-                temp_dir = tempfile.mkdtemp()
-                temp_path = os.path.join(temp_dir, "participants.csv")
-                participants_file.save(temp_path)
-                
-                # Read the CSV with proper handling
-                with open(temp_path, 'r', newline='', encoding='utf-8-sig') as f:
-                    reader = csv.DictReader(f)
-                    headers = reader.fieldnames
-                    new_participants = []
-                    
-                    # Basic validation: check for required headers
-                    required_participant_headers = ["id", "first_name", "last_name", "team_id", "created_at"]
-                    optional_headers = ["needs_teammate"]
-                    missing_headers = [h for h in required_participant_headers if h not in headers]
-                    
-                    if missing_headers:
-                        flash(f"Participants CSV is missing required headers: {', '.join(missing_headers)}", "danger")
-                    else:
-                        # Process each row
-                        for row in reader:
-                            # Clean and validate data
-                            clean_row = {}
-                            # Copy all fields that were in the CSV
-                            for key in headers:
-                                clean_row[key] = row[key].strip() if row[key] else ""
-                                
-                            # Add needs_teammate if missing
-                            if "needs_teammate" not in clean_row:
-                                clean_row["needs_teammate"] = "false"
-                                
-                            new_participants.append(clean_row)
-                            
-                        if not new_participants:
-                            flash("Participants CSV is empty or has no data rows.", "warning")
-                        else:
-                            # Use the existing write_csv function
-                            write_csv("data/participants.csv", new_participants)
-                            flash(f"Participants data uploaded successfully. {len(new_participants)} records imported.", "success")
-                            action_taken = True
-                
-                # Clean up temp file
-                import shutil
-                shutil.rmtree(temp_dir)
-                
-            except Exception as e:
-                flash(f"Error processing participants CSV: {str(e)}", "danger")
-                import traceback
-                app.logger.error(f"CSV upload error: {traceback.format_exc()}")
-        
-        if teams_file and teams_file.filename != '':
             try:
-                # Save the file to a temporary location
-                import tempfile
-                temp_dir = tempfile.mkdtemp()
-                temp_path = os.path.join(temp_dir, "teams.csv")
-                teams_file.save(temp_path)
-                
-                # Read the CSV with proper handling
-                with open(temp_path, 'r', newline='', encoding='utf-8-sig') as f:
-                    reader = csv.DictReader(f)
-                    headers = reader.fieldnames
-                    new_teams = []
-                    
-                    # Basic validation: check for required headers
-                    required_team_headers = ["id", "name", "created_at"]
-                    missing_headers = [h for h in required_team_headers if h not in headers]
-                    
-                    if missing_headers:
-                        flash(f"Teams CSV is missing required headers: {', '.join(missing_headers)}", "danger")
-                    else:
-                        # Process each row
-                        for row in reader:
-                            # Clean and validate data
-                            clean_row = {}
-                            for key in headers:
-                                clean_row[key] = row[key].strip() if row[key] else ""
-                                
-                            new_teams.append(clean_row)
-                            
-                        if not new_teams:
-                            flash("Teams CSV is empty or has no data rows.", "warning")
-                        else:
-                            # Use the existing write_csv function
-                            write_csv("data/teams.csv", new_teams)
-                            flash(f"Teams data uploaded successfully. {len(new_teams)} records imported.", "success")
-                            action_taken = True
-                
-                # Clean up temp file
-                import shutil
-                shutil.rmtree(temp_dir)
-                
+                # Rows are parsed and validated straight from the upload stream
+                result = import_csv(table, upload.stream, mode=import_mode, key=import_key)
+            except CsvImportError as e:
+                flash(f"{label} CSV could not be imported: {e}", "danger")
+                continue
             except Exception as e:
-                flash(f"Error processing teams CSV: {str(e)}", "danger")
+                flash(f"Error processing {table} CSV: {str(e)}", "danger")
                 import traceback
                 app.logger.error(f"CSV upload error: {traceback.format_exc()}")
-        
-        if not action_taken and not participants_file and not teams_file:
-             flash("No files selected for upload.", "info")
-        elif not action_taken and (participants_file or teams_file):
-            if participants_file and participants_file.filename == '':
-                flash("Participants file was selected but appears to be empty or invalid.", "warning")
-            if teams_file and teams_file.filename == '':
-                flash("Teams file was selected but appears to be empty or invalid.", "warning")
+                continue
+
+            if result["inserted"] or result["updated"]:
+                action_taken = True
+                flash(
+                    f"{label} data uploaded successfully ({import_mode}). "
+                    f"{result['inserted']} added, {result['updated']} updated, "
+                    f"{result['skipped']} already present.",
+                    "success"
+                )
+            elif not result["error_count"]:
+                if result["rows"]:
+                    flash(f"{label} CSV contained no new records.", "info")
+                else:
+                    flash(f"{label} CSV is empty or has no data rows.", "warning")
+
+            if result["error_count"]:
+                shown = "; ".join(result["errors"][:UPLOAD_ERRORS_SHOWN])
+                more = result["error_count"] - min(len(result["errors"]), UPLOAD_ERRORS_SHOWN)
+                suffix = f" (and {more} more)" if more > 0 else ""
+                flash(f"{label} CSV: {result['error_count']} row(s) skipped: {shown}{suffix}", "warning")
+
+        if not files_selected:
+            flash("No files selected for upload.", "info")
 
         return redirect(url_for('admin_csv_upload'))
         
@@ -947,12 +1043,7 @@ def admin_csv_upload():
 @app.route("/admin/csv-download/<file_type>")
 @admin_required
 def csv_download(file_type):
-    filename_map = {
-        "participants": "data/participants.csv",
-        "teams": "data/teams.csv",
-        "tournaments": "data/tournaments.csv",
-        "matches": "data/matches.csv"
-    }
+    filename_map = EXPORT_TABLES
     
     if file_type not in filename_map:
         flash("Invalid file type for download.", "danger")
@@ -962,12 +1053,7 @@ def csv_download(file_type):
     
     if not os.path.exists(filepath):
         # Check if the file is empty or doesn't exist, create with headers if it should exist
-        headers_map = {
-            "participants": ["id", "first_name", "last_name", "team_id", "needs_teammate", "created_at"],
-            "teams": ["id", "name", "created_at"],
-            "tournaments": ["id", "name", "type", "status", "created_at"],
-            "matches": ["id", "tournament_id", "round", "match_in_round", "team1_id", "team2_id", "team1_score", "team2_score", "winner_id", "status", "next_match_id", "next_match_position"]
-        }
+        headers_map = TABLE_HEADERS
         if file_type in headers_map:
             try:
                 with open(filepath, 'w', newline='', encoding='utf-8') as f:
@@ -982,19 +1068,104 @@ def csv_download(file_type):
             return redirect(url_for('admin_csv_upload'))
 
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            csv_data = f.read()
+        # Stream the file in chunks rather than reading it into memory
+        handle = open_snapshot([file_type])[file_type]
         
         return Response(
-            csv_data,
+            stream_file(handle),
             mimetype="text/csv",
             headers={"Content-disposition":
-                     f"attachment; filename={file_type}.csv"}
+                     f"attachment; filename={file_type}.csv",
+                     "Content-Length": str(snapshot_size(handle))}
         )
     except Exception as e:
         flash(f"Error preparing {file_type} CSV for download: {e}", "danger")
         return redirect(url_for('admin_csv_upload'))
 
+@app.route("/admin/csv-download/all")
+@admin_required
+def csv_download_all():
+    """Download all four tables as one ZIP, taken as a single consistent snapshot."""
+    handles = open_snapshot(EXPORT_TABLES.keys())
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    
+    return Response(
+        stream_zip(handles),
+        mimetype="application/zip",
+        headers={"Content-disposition":
+                 f"attachment; filename=cornhole-data-{timestamp}.zip"}
+    )
+
+def _metrics_snapshot():
+    return metrics.snapshot(external_caches={
+        "compression": {"hits": compression_cache.hits, "misses": compression_cache.misses}
+    })
+
+@app.route("/admin/metrics")
+@admin_required
+def admin_metrics():
+    """Request latency, storage I/O and cache hit rates of this worker."""
+    return render_template("admin_metrics.html", snapshot=_metrics_snapshot())
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Metrics in Prometheus text format, for a scraper holding METRICS_TOKEN or a logged-in admin."""
+    # The client address can't be trusted behind a reverse proxy, so scrapers authenticate instead
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    has_token = bool(METRICS_TOKEN) and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+    if not has_token and not session.get("admin_logged_in"):
+        return Response("Forbidden", status=403, mimetype="text/plain")
+    return Response(prometheus_text(_metrics_snapshot()), mimetype="text/plain; version=0.0.4")
+
+@app.route("/admin/profiler", methods=["GET", "POST"])
+@admin_required
+def admin_profiler():
+    """Switch request sampling on or off and list the stored profiles."""
+    if request.method == "POST":
+        try:
+            sample_rate = float(request.form.get("sample_rate", "0"))
+        except ValueError:
+            sample_rate = -1
+        if not 0 <= sample_rate <= 1:
+            flash("Sample rate must be a number between 0 and 1", "danger")
+            return redirect(url_for("admin_profiler"))
+        
+        enabled = request.form.get("enabled") == "on"
+        save_profiler_settings(enabled, sample_rate)
+        flash(f"Profiling {'enabled' if enabled else 'disabled'}", "success")
+        return redirect(url_for("admin_profiler"))
+    
+    profiles_by_endpoint = {}
+    for profile in list_profiles():
+        profiles_by_endpoint.setdefault(profile["endpoint"], []).append(profile)
+    
+    return render_template(
+        "admin_profiler.html",
+        settings=load_profiler_settings(),
+        profiles_by_endpoint=dict(sorted(profiles_by_endpoint.items()))
+    )
+
+@app.route("/admin/profiler/<profile_id>/<fmt>")
+@admin_required
+def admin_profile_download(profile_id, fmt):
+    """A stored profile as a pstats file, collapsed stacks, or a text summary."""
+    path = profile_path(profile_id)
+    if not path or fmt not in ("pstats", "collapsed", "txt"):
+        flash("Profile not found", "danger")
+        return redirect(url_for("admin_profiler"))
+    
+    if fmt == "pstats":
+        with open(path, "rb") as f:
+            data = f.read()
+        return Response(data, mimetype="application/octet-stream", headers={
+            "Content-disposition": f"attachment; filename={profile_id}.prof"
+        })
+    if fmt == "collapsed":
+        return Response(collapsed_stacks(path), mimetype="text/plain", headers={
+            "Content-disposition": f"attachment; filename={profile_id}.collapsed.txt"
+        })
+    return Response(profile_summary(path), mimetype="text/plain")
+
 @app.route("/tournament/<tournament_id>")
 def public_tournament_view(tournament_id):
     """Public tournament bracket view page that works as a landing page."""
@@ -1003,8 +1174,7 @@ def public_tournament_view(tournament_id):
         flash("Tournament not found", "danger")
         return redirect(url_for("index"))
     
-    matches = get_matches()
-    tournament_matches = [m for m in matches if m["tournament_id"] == tournament_id]
+    tournament_matches = get_tournament_matches(tournament_id)
     
     # Group matches by round
     rounds = {}
@@ -1020,16 +1190,82 @@ def public_tournament_view(tournament_id):
     teams = get_teams()
     team_dict = {team["id"]: team["name"] for team in teams}
     
+    # Card positions and connector paths, drawn client-side in one pass
+    layout = compute_bracket_layout(tournament_matches, card_height=180)
+    
+    # Simulated in the background after each result; may lag one score behind
+    odds = get_odds(tournament, tournament_matches)
+    
     return render_template(
         "public_tournament_view.html",
         tournament=tournament,
         rounds=sorted_rounds,
-        team_dict=team_dict
+        team_dict=team_dict,
+        layout=layout,
+        odds=odds,
+        odds_rows=odds_table(odds, team_dict) if odds else []
     )
 
+@app.route("/api/tournament/<tournament_id>/bracket")
+def tournament_bracket_api(tournament_id):
+    """Tournament matches with precomputed bracket layout as JSON."""
+    tournament = get_tournament_by_id(tournament_id)
+    if not tournament:
+        return jsonify({"error": "Tournament not found"}), 404
+    
+    tournament_matches = get_tournament_matches(tournament_id)
+    
+    teams = get_teams()
+    team_dict = {team["id"]: team["name"] for team in teams}
+    
+    return jsonify({
+        "tournament": tournament,
+        "matches": tournament_matches,
+        "teams": {
+            team_id: team_dict[team_id]
+            for m in tournament_matches
+            for team_id in (m["team1_id"], m["team2_id"])
+            if team_id in team_dict
+        },
+        "layout": compute_bracket_layout(tournament_matches)
+    })
+
+@app.route("/api/tournament/<tournament_id>/odds")
+def tournament_odds_api(tournament_id):
+    """Each team's simulated chance of reaching each round and of winning."""
+    tournament = get_tournament_by_id(tournament_id)
+    if not tournament:
+        return jsonify({"error": "Tournament not found"}), 404
+    
+    odds = get_odds(tournament, get_tournament_matches(tournament_id))
+    if odds is None:
+        return jsonify({"error": "Odds are not available for this tournament yet"}), 404
+    
+    return jsonify({
+        "tournament_id": tournament_id,
+        "runs": odds["runs"],
+        "computed_at": odds["computed_at"],
+        "stale": odds["stale"],
+        "rounds": odds["rounds"],
+        "teams": odds["teams"]
+    })
+
+@app.route("/tournament/<tournament_id>/bracket.svg")
+def tournament_bracket_svg(tournament_id):
+    """Static SVG image of the bracket for projector screens and print."""
+    svg, digest = get_bracket_svg(tournament_id)
+    if svg is None:
+        return Response("Tournament not found", status=404, mimetype="text/plain")
+    
+    response = Response(svg, mimetype="image/svg+xml")
+    response.set_etag(digest)
+    # Lobby displays revalidate on every refresh and get a 304 until a result changes
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
 # For debugging purposes, you can add this to check what values are being loaded
-print(f"Admin username from env: {os.environ.get('ADMIN_USERNAME')}")  # This will print during startup
-print(f"Admin password from env: (length: {len(os.environ.get('ADMIN_PASSWORD', ''))})")  # Print password length for security
+app.logger.info(f"Admin username from env: {os.environ.get('ADMIN_USERNAME')}")
+app.logger.info(f"Admin password from env: (length: {len(os.environ.get('ADMIN_PASSWORD', ''))})")  # Log password length for security
 
 @app.errorhandler(CSRFError)
 @app.errorhandler(CSRFError)
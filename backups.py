@@ -0,0 +1,273 @@
+import logging
+import os
+import shutil
+import sys
+import tarfile
+import threading
+import time
+from datetime import datetime
+
+from data_versions import table_versions
+from match_journal import JOURNAL_PATH
+from utils import data_write_lock
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker may run the scheduler
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "data"
+BACKUP_DIR = "backups"
+
+# Seconds between scheduled snapshots, and how many / how old to keep
+BACKUP_INTERVAL = 900
+BACKUP_KEEP = 48
+BACKUP_MAX_AGE_DAYS = 7
+
+BACKUP_PREFIX = "data-"
+BACKUP_SUFFIX = ".tar.gz"
+
+# Files that make up the data set. Everything here is replaced by rename when
+# it changes (append_csv included, which appends to a copy), so a hard link
+# pins its current contents; the match journal is appended to in place and
+# has to be copied instead.
+LINKED_PATTERNS = [
+    ("", ".csv"),
+    (".journal", ".journal"),
+    (".sequences", ".seq"),
+    ("", ".schema_version"),
+]
+
+
+def _data_files():
+    """Relative paths of the files a snapshot holds, excluding the journal."""
+    paths = []
+    for subdir, suffix in LINKED_PATTERNS:
+        directory = os.path.join(DATA_DIR, subdir)
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        paths.extend(os.path.join(subdir, name) for name in names
+                     if name.endswith(suffix) and os.path.isfile(os.path.join(directory, name)))
+    return paths
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        # Different file system, or links unsupported: fall back to a copy
+        shutil.copy2(source, target)
+
+
+def list_backups():
+    """Backup archive names, oldest first."""
+    try:
+        names = os.listdir(BACKUP_DIR)
+    except OSError:
+        return []
+    return sorted(n for n in names if n.startswith(BACKUP_PREFIX) and n.endswith(BACKUP_SUFFIX))
+
+
+def create_backup(label=""):
+    """
+    Take a point-in-time snapshot of data/ and return the archive path.
+
+    Under the data write lock the files are only hard-linked (and the journal
+    copied) into a staging directory, which takes well under a millisecond
+    per file. Compressing the staged files happens after the lock is released.
+    """
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    name = f"{BACKUP_PREFIX}{stamp}{'-' + label if label else ''}"
+    staging = os.path.join(BACKUP_DIR, f".staging-{name}-{os.getpid()}")
+    os.makedirs(staging)
+
+    try:
+        with data_write_lock():
+            for relative_path in _data_files():
+                target = os.path.join(staging, relative_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                _link_or_copy(os.path.join(DATA_DIR, relative_path), target)
+            if os.path.exists(JOURNAL_PATH):
+                shutil.copy2(JOURNAL_PATH, os.path.join(staging, os.path.basename(JOURNAL_PATH)))
+
+        archive_path = os.path.join(BACKUP_DIR, f"{name}{BACKUP_SUFFIX}")
+        tmp_path = f"{archive_path}.tmp"
+        with tarfile.open(tmp_path, "w:gz") as archive:
+            archive.add(staging, arcname="data")
+        os.replace(tmp_path, archive_path)
+        return archive_path
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_settings():
+    """
+    Read the backup settings from the environment.
+
+    Called from init_backups() and the command line rather than at import,
+    so settings from .env apply however the module was imported.
+    """
+    global BACKUP_DIR, BACKUP_INTERVAL, BACKUP_KEEP, BACKUP_MAX_AGE_DAYS
+    BACKUP_DIR = os.environ.get("BACKUP_DIR", "backups")
+    BACKUP_INTERVAL = int(os.environ.get("BACKUP_INTERVAL", "900"))
+    BACKUP_KEEP = int(os.environ.get("BACKUP_KEEP", "48"))
+    BACKUP_MAX_AGE_DAYS = int(os.environ.get("BACKUP_MAX_AGE_DAYS", "7"))
+
+
+def rotate_backups(keep=None, max_age_days=None):
+    """Delete backups beyond the newest `keep`, and any older than max_age_days."""
+    keep = BACKUP_KEEP if keep is None else keep
+    max_age_days = BACKUP_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    removed = []
+    names = list_backups()
+    cutoff = time.time() - max_age_days * 86400
+    for index, name in enumerate(names):
+        path = os.path.join(BACKUP_DIR, name)
+        too_many = index < len(names) - keep
+        try:
+            if too_many or os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed.append(name)
+        except OSError:
+            continue
+    return removed
+
+
+def restore_backup(name):
+    """
+    Replace the live data files with those from a backup archive.
+
+    The current data is backed up first. The archive is unpacked next to
+    data/ and its files are renamed into place under the write lock, so the
+    app never sees a half-restored data set.
+    """
+    archive_path = os.path.join(BACKUP_DIR, name)
+    if not os.path.isfile(archive_path):
+        raise FileNotFoundError(f"No backup named {name}")
+
+    create_backup(label="pre-restore")
+
+    unpack_dir = os.path.join(DATA_DIR, f".restore-{os.getpid()}")
+    try:
+        with tarfile.open(archive_path, "r:gz") as archive:
+            members = [m for m in archive.getmembers()
+                       if m.isfile() and m.name.startswith("data/") and ".." not in m.name.split("/")]
+            archive.extractall(unpack_dir, members=members, filter="data")
+        restored = os.path.join(unpack_dir, "data")
+
+        with data_write_lock():
+            # Files the backup doesn't have (e.g. a newer journal) must go too
+            current = set(_data_files())
+            if os.path.exists(JOURNAL_PATH):
+                current.add(os.path.basename(JOURNAL_PATH))
+            incoming = set()
+            for root, _, files in os.walk(restored):
+                for file_name in files:
+                    incoming.add(os.path.relpath(os.path.join(root, file_name), restored))
+
+            for relative_path in sorted(incoming):
+                target = os.path.join(DATA_DIR, relative_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(os.path.join(restored, relative_path), target)
+            for relative_path in sorted(current - incoming):
+                os.remove(os.path.join(DATA_DIR, relative_path))
+
+            # Let every worker know its cached tables are stale
+            for file_path in table_versions.slots:
+                table_versions.bump(file_path)
+        return sorted(incoming)
+    finally:
+        shutil.rmtree(unpack_dir, ignore_errors=True)
+
+
+def _latest_backup_age():
+    names = list_backups()
+    if not names:
+        return None
+    try:
+        return time.time() - os.path.getmtime(os.path.join(BACKUP_DIR, names[-1]))
+    except OSError:
+        return None
+
+
+class BackupScheduler(threading.Thread):
+    """Daemon thread taking a backup every BACKUP_INTERVAL seconds."""
+
+    def __init__(self, interval=None):
+        super().__init__(name="backup-scheduler", daemon=True)
+        self.interval = BACKUP_INTERVAL if interval is None else interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(min(self.interval, 60)):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Scheduled backup failed: {e}")
+
+    def run_once(self):
+        """Take a backup if one is due; only one worker process does so at a time."""
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        with open(os.path.join(BACKUP_DIR, ".scheduler.lock"), "a") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return None  # another worker is taking it
+            age = _latest_backup_age()
+            if age is not None and age < self.interval:
+                return None
+            path = create_backup()
+            rotate_backups()
+            return path
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_scheduler = None
+_scheduler_pid = None
+
+
+def init_backups(app):
+    """Run the backup scheduler in each worker process once it serves requests."""
+    load_settings()
+    app.config.setdefault("BACKUP_ENABLED", os.environ.get("BACKUP_ENABLED", "true").lower() != "false")
+    if not app.config["BACKUP_ENABLED"]:
+        return
+
+    @app.before_request
+    def ensure_backup_scheduler():
+        # Threads don't survive fork, so a preloaded master's scheduler
+        # wouldn't run in the workers; each worker starts its own
+        global _scheduler, _scheduler_pid
+        if _scheduler_pid != os.getpid():
+            _scheduler_pid = os.getpid()
+            _scheduler = BackupScheduler()
+            _scheduler.start()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # Use the same backup directory and retention as the app
+    load_dotenv()
+    load_settings()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "list":
+        for backup in list_backups():
+            print(backup)
+    elif command == "create":
+        print(f"Created {create_backup()}")
+        for backup in rotate_backups():
+            print(f"Removed {backup}")
+    elif command == "restore" and len(sys.argv) == 3:
+        files = restore_backup(sys.argv[2])
+        print(f"Restored {len(files)} file(s) from {sys.argv[2]}")
+    else:
+        print("Usage: python backups.py [list | create | restore <backup name>]")
+        sys.exit(2)
@@ -0,0 +1,97 @@
+"""
+Regression benchmark for the admin pages that group participants by team.
+
+Renders team_management, tournament_config and team_name_management through
+Flask's test client against a synthetic data directory and reports the
+median render time of each. Run from the repository root:
+
+    python benchmarks/bench_grouping.py --participants 5000 --teams 2500
+
+It exits non-zero if any page's median exceeds the budget: --max-ms, or by
+default BUDGET_MS scaled linearly from 5,000 participants, which a grouping
+that went back to scanning participants per team blows through.
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ["/admin/teams", "/admin/tournament/new", "/admin/team-names"]
+
+# Median render budget per page at BUDGET_PARTICIPANTS participants; render
+# time should grow linearly with the data, so the budget scales with it
+BUDGET_MS = 500.0
+BUDGET_PARTICIPANTS = 5000
+
+
+def write_data(data_dir, participant_count, team_count):
+    """Write synthetic participants and teams CSVs, two players per team."""
+    os.makedirs(data_dir, exist_ok=True)
+    created_at = "2025-05-05 12:00:00"
+
+    with open(os.path.join(data_dir, "teams.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "created_at"])
+        for i in range(1, team_count + 1):
+            # Every tenth team still has a TBD name
+            writer.writerow([str(i), "TBD" if i % 10 == 0 else f"Team {i}", created_at])
+
+    with open(os.path.join(data_dir, "participants.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "first_name", "last_name", "team_id", "needs_teammate", "created_at"])
+        for i in range(1, participant_count + 1):
+            team_id = str((i + 1) // 2) if (i + 1) // 2 <= team_count else ""
+            writer.writerow([str(i), f"First{i}", f"Last{i}", team_id, str(not team_id), created_at])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--participants", type=int, default=5000)
+    parser.add_argument("--teams", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if any page's median render time exceeds this budget "
+                             f"(default {BUDGET_MS:.0f} ms per {BUDGET_PARTICIPANTS} participants)")
+    args = parser.parse_args()
+    if args.max_ms is None:
+        args.max_ms = BUDGET_MS * max(args.participants, BUDGET_PARTICIPANTS) / BUDGET_PARTICIPANTS
+
+    work_dir = tempfile.mkdtemp(prefix="mcc-bench-")
+    write_data(os.path.join(work_dir, "data"), args.participants, args.teams)
+
+    # The app resolves data/ relative to the working directory at import time
+    os.chdir(work_dir)
+    os.environ.setdefault("ADMIN_USERNAME", "bench")
+    os.environ.setdefault("ADMIN_PASSWORD", "bench")
+    sys.path.insert(0, REPO_ROOT)
+    from app import app
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin_logged_in"] = True
+
+    print(f"{args.participants} participants, {args.teams} teams, median of {args.repeat}, "
+          f"budget {args.max_ms:.0f} ms")
+    failed = False
+    for page in PAGES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(page)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, f"{page} returned {response.status_code}"
+        median = statistics.median(timings)
+        over_budget = median > args.max_ms
+        failed = failed or over_budget
+        print(f"  {page:<24} {median:8.1f} ms{'  OVER BUDGET' if over_budget else ''}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+Load test replaying a tournament-day traffic mix against a local server.
+
+Generates a synthetic data directory (see synthetic_data.py), starts the
+app on it under gunicorn (or Flask's threaded server if gunicorn isn't
+installed) and runs three kinds of clients at once: spectators polling
+public bracket pages, bursts of registrations, and admins entering scores.
+At the end it reports throughput, latency percentiles and error rates per
+kind of request, then checks that every acknowledged registration and
+score made it into the CSV files. Run from the repository root:
+
+    python benchmarks/load_test.py --duration 60 --spectators 100 --scorekeepers 4
+"""
+import argparse
+import http.cookiejar
+import importlib.util
+import json
+import os
+import queue
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from synthetic_data import REPO_ROOT, add_scale_arguments, generate_data
+
+CSRF_PATTERN = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+ADMIN_USERNAME = "loadtest"
+ADMIN_PASSWORD = "loadtest"
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses, so a POST's own status and target are visible."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Client:
+    """One browser: its own cookies, so its own session and CSRF token."""
+
+    def __init__(self, base_url, stats):
+        self.base_url = base_url
+        self.stats = stats
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, kind, path, form=None):
+        """Return (status, body, Location header); status is None on connection errors."""
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=data, timeout=30) as response:
+                status, body, location = response.status, response.read(), None
+        except urllib.error.HTTPError as e:
+            status, body, location = e.code, e.read(), e.headers.get("Location")
+        except (OSError, urllib.error.URLError):
+            status, body, location = None, b"", None
+        self.stats.record(kind, time.perf_counter() - start, status is None or status >= 400)
+        return status, body.decode("utf-8", "replace"), location
+
+    def csrf_token(self, kind, path):
+        status, body, _ = self.request(kind, path)
+        match = CSRF_PATTERN.search(body) if status == 200 else None
+        return match.group(1) if match else None
+
+
+class Stats:
+    """Latencies and error counts per kind of request, shared by all client threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, kind, seconds, failed):
+        with self._lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            self.errors[kind] = self.errors.get(kind, 0) + (1 if failed else 0)
+
+    def summary(self, elapsed):
+        summary = {}
+        for kind, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+
+            def percentile(q):
+                return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+            summary[kind] = {
+                "requests": len(ordered),
+                "throughput_rps": round(len(ordered) / elapsed, 1),
+                "p50_ms": percentile(0.50),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(ordered[-1] * 1000, 1),
+                "error_rate": round(self.errors[kind] / len(ordered), 4),
+            }
+        return summary
+
+
+def spectator(base_url, stats, tournament_ids, poll_interval, stop):
+    client = Client(base_url, stats)
+    # Spread the first polls out instead of starting them all at once
+    stop.wait(random.uniform(0, poll_interval))
+    while not stop.is_set():
+        client.request("GET /tournament/<id>", f"/tournament/{random.choice(tournament_ids)}")
+        stop.wait(poll_interval)
+
+
+def register(base_url, stats, name, acknowledged):
+    client = Client(base_url, stats)
+    token = client.csrf_token("GET /register", "/register")
+    if token is None:
+        return
+    first_name, last_name = name
+    status, _, location = client.request("POST /register", "/register", {
+        "csrf_token": token,
+        "first_name": first_name,
+        "last_name": last_name,
+        "team_name": f"{first_name} {last_name} Team",
+        "teammate_option": "none",
+    })
+    # Failed registrations redirect back to the form, successful ones away from it
+    if status == 302 and location and not urllib.parse.urlparse(location).path.endswith("/register"):
+        acknowledged.append(name)
+
+
+def registration_bursts(base_url, stats, burst_size, burst_interval, acknowledged, stop):
+    burst = 0
+    while not stop.wait(burst_interval):
+        burst += 1
+        threads = [
+            threading.Thread(target=register, args=(
+                base_url, stats, (f"Load{burst}x{i}", f"Tester{burst}x{i}"), acknowledged))
+            for i in range(burst_size)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def scorekeeper(base_url, stats, playable, think_time, acknowledged, stop):
+    client = Client(base_url, stats)
+    token = client.csrf_token("GET /admin/login", "/admin/login")
+    status, _, _ = client.request("POST /admin/login", "/admin/login", {
+        "csrf_token": token or "", "username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    if status != 302:
+        print(f"Scorekeeper could not log in (status {status})")
+        return
+
+    while not stop.is_set():
+        try:
+            match_id = playable.get_nowait()
+        except queue.Empty:
+            return
+        token = client.csrf_token("GET /admin/match/<id>", f"/admin/match/{match_id}")
+        if token is None:
+            continue
+        scores = (21, random.randint(0, 20))
+        if random.random() < 0.5:
+            scores = scores[::-1]
+        status, _, location = client.request("POST /admin/match/<id>", f"/admin/match/{match_id}", {
+            "csrf_token": token, "team1_score": str(scores[0]), "team2_score": str(scores[1])})
+        # Rejected scores redirect back to the match page instead of the bracket
+        if status == 302 and location and "/admin/match/" not in location:
+            acknowledged.append((match_id, scores))
+        stop.wait(think_time)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(work_dir, port, server, workers, threads, preload):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, ADMIN_USERNAME=ADMIN_USERNAME,
+               ADMIN_PASSWORD=ADMIN_PASSWORD, BACKUP_ENABLED="false",
+               # Every worker must sign sessions with the same key
+               SESSION_SECRET="load-test-secret")
+    if server == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "--workers", str(workers),
+                   "--threads", str(threads), "--bind", f"127.0.0.1:{port}", "main:app"]
+        if preload:
+            command.insert(3, "--preload")
+            env["PRELOAD_DATA"] = "1"
+    else:
+        command = [sys.executable, "-c",
+                   f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+
+    log = open(os.path.join(work_dir, "server.log"), "w")
+    process = subprocess.Popen(command, cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited; see {log.name}")
+        try:
+            with urllib.request.urlopen(base_url + "/register", timeout=2):
+                return process, base_url
+        except (OSError, urllib.error.URLError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server did not start within 60 seconds; see {log.name}")
+
+
+def check_integrity(scores, registrations):
+    """
+    Compare what clients were told succeeded with the data on disk.
+
+    Must run with the data directory as the working directory, after the
+    server has stopped. Returns a list of problems found.
+    """
+    sys.path.insert(0, REPO_ROOT)
+    from utils import compact_match_journal, read_csv
+
+    problems = []
+
+    # Fold the journal in first, so matches.csv itself is what gets checked
+    compact_match_journal()
+    matches = {m["id"]: m for m in read_csv("data/matches.csv")}
+    for match_id, (team1_score, team2_score) in scores:
+        match = matches.get(match_id)
+        if match is None:
+            problems.append(f"match {match_id} is missing")
+            continue
+        if (match["team1_score"], match["team2_score"]) != (str(team1_score), str(team2_score)):
+            problems.append(f"match {match_id} has {match['team1_score']}-{match['team2_score']}, "
+                            f"expected {team1_score}-{team2_score} (lost update)")
+            continue
+        next_match = matches.get(match["next_match_id"])
+        if next_match:
+            slot = "team1_id" if match["next_match_position"] == "1" else "team2_id"
+            if next_match[slot] != match["winner_id"]:
+                problems.append(f"winner of {match_id} did not advance to {next_match['id']}")
+
+    participants = read_csv("data/participants.csv")
+    registered = {}
+    for participant in participants:
+        name = (participant["first_name"], participant["last_name"])
+        registered[name] = registered.get(name, 0) + 1
+    for name in registrations:
+        if registered.get(name, 0) != 1:
+            problems.append(f"{' '.join(name)} was registered but appears "
+                            f"{registered.get(name, 0)} times in participants.csv")
+
+    team_ids = {team["id"] for team in read_csv("data/teams.csv")}
+    for table, rows in (("participants", participants), ("teams", read_csv("data/teams.csv")),
+                        ("matches", list(matches.values()))):
+        ids = [row["id"] for row in rows]
+        if len(ids) != len(set(ids)):
+            problems.append(f"{table}.csv has {len(ids) - len(set(ids))} duplicate ids")
+    for participant in participants:
+        if participant["team_id"] and participant["team_id"] not in team_ids:
+            problems.append(f"participant {participant['id']} points at missing team "
+                            f"{participant['team_id']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_scale_arguments(parser)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic")
+    parser.add_argument("--spectators", type=int, default=50)
+    parser.add_argument("--poll-interval", type=float, default=5,
+                        help="Seconds between a spectator's polls (the page itself reloads every 30)")
+    parser.add_argument("--burst-size", type=int, default=10,
+                        help="Registrations sent at once in each burst")
+    parser.add_argument("--burst-interval", type=float, default=5)
+    parser.add_argument("--scorekeepers", type=int, default=4)
+    parser.add_argument("--think-time", type=float, default=0.5,
+                        help="Seconds a scorekeeper waits between scores")
+    parser.add_argument("--server", choices=["gunicorn", "flask"],
+                        default="gunicorn" if importlib.util.find_spec("gunicorn") else "flask")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--preload", action="store_true", help="Start gunicorn with --preload")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    work_dir = tempfile.mkdtemp(prefix="mcc-load-")
+    counts = generate_data(os.path.join(work_dir, "data"), args.participants, args.teams,
+                           args.tournaments, args.teams_per_tournament, args.seed)
+
+    # Spectators watch the live brackets; scorekeepers work through their playable matches
+    sys.path.insert(0, REPO_ROOT)
+    from utils import read_csv
+    tournaments = read_csv(os.path.join(work_dir, "data", "tournaments.csv"))
+    live = [t["id"] for t in tournaments if t["status"] == "active"] or [t["id"] for t in tournaments]
+    playable = queue.Queue()
+    for match in read_csv(os.path.join(work_dir, "data", "matches.csv")):
+        if (match["tournament_id"] in live and match["status"] == "pending"
+                and match["team1_id"] and match["team2_id"]):
+            playable.put(match["id"])
+
+    process, base_url = start_server(work_dir, _free_port(), args.server, args.workers,
+                                     args.threads, args.preload)
+    print(f"{', '.join(f'{count} {table}' for table, count in counts.items())}; "
+          f"{args.server} at {base_url}, data in {work_dir}")
+
+    stats = Stats()
+    stop = threading.Event()
+    scores, registrations = [], []
+    threads = [threading.Thread(target=spectator, args=(base_url, stats, live, args.poll_interval, stop))
+               for _ in range(args.spectators)]
+    threads.append(threading.Thread(target=registration_bursts, args=(
+        base_url, stats, args.burst_size, args.burst_interval, registrations, stop)))
+    threads.extend(threading.Thread(target=scorekeeper, args=(
+        base_url, stats, playable, args.think_time, scores, stop)) for _ in range(args.scorekeepers))
+
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        stop.wait(args.duration)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        process.terminate()
+        process.wait()
+
+    summary = stats.summary(elapsed)
+    total = sum(result["requests"] for result in summary.values())
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f}/s)")
+    print(f"  {'request':<26} {'count':>7} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>7}")
+    for kind, result in summary.items():
+        print(f"  {kind:<26} {result['requests']:>7} {result['throughput_rps']:>7} "
+              f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+              f"{result['max_ms']:>8} {result['error_rate']:>7.1%}")
+
+    os.chdir(work_dir)
+    problems = check_integrity(scores, registrations)
+    print(f"{len(scores)} scores and {len(registrations)} registrations acknowledged; "
+          f"{len(problems)} integrity problem(s)")
+    for problem in problems:
+        print(f"  {problem}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({
+                "settings": {key: value for key, value in vars(args).items() if key != "output"},
+                "scale": counts,
+                "elapsed_s": round(elapsed, 2),
+                "requests": summary,
+                "acknowledged": {"scores": len(scores), "registrations": len(registrations)},
+                "integrity_problems": problems,
+            }, f, indent=2)
+        print(f"Wrote {output}")
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
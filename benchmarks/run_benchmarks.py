@@ -0,0 +1,236 @@
+"""
+Benchmark suite for CSV storage, bracket generation and the main routes.
+
+Generates a synthetic data directory (see synthetic_data.py), then times
+read_csv/write_csv, each generate_*_bracket function, score entry with
+winner advancement in match_view, and the main pages through Flask's test
+client. Results are written as JSON so runs can be compared between
+commits. Run from the repository root:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from synthetic_data import REPO_ROOT, add_scale_arguments, generate_data
+
+TABLES = ["participants", "teams", "tournaments", "matches"]
+
+BRACKET_FUNCTIONS = [
+    "generate_single_elimination_bracket",
+    "generate_double_elimination_bracket",
+    "generate_round_robin_bracket",
+]
+
+# Differences smaller than this are treated as noise when comparing runs
+MIN_REGRESSION_MS = 0.5
+
+
+def measure(fn, repeat):
+    """Call fn repeat times and summarise the wall time of each call in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "repeat": repeat,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_storage(results, repeat):
+    from utils import read_csv, write_csv
+
+    for table in TABLES:
+        path = f"data/{table}.csv"
+        results[f"read_csv.{table}"] = measure(lambda: read_csv(path), repeat)
+
+    # Written beside the real tables so the app's own files are untouched
+    rows = read_csv("data/matches.csv")
+    results["write_csv.matches"] = measure(lambda: write_csv("data/bench_matches.csv", rows), repeat)
+
+
+def bench_brackets(results, repeat, sizes):
+    import utils
+
+    for name in BRACKET_FUNCTIONS:
+        generate = getattr(utils, name)
+        for size in sizes:
+            team_ids = [str(i) for i in range(1, size + 1)]
+            # The generators may modify the list they are given
+            results[f"{name}.{size}"] = measure(lambda: generate("bench", list(team_ids)), repeat)
+
+
+def bench_routes(results, client, repeat):
+    from utils import get_tournaments, get_tournament_matches
+
+    # The tournament with the most matches gives the heaviest bracket pages
+    tournament_id = max((t["id"] for t in get_tournaments()),
+                        key=lambda tid: len(get_tournament_matches(tid)), default="1")
+    match_id = next((m["id"] for m in get_tournament_matches(tournament_id)), "1")
+    routes = [
+        "/",
+        "/tournaments",
+        "/admin/dashboard",
+        "/admin/teams",
+        "/admin/team-names",
+        "/admin/tournament/new",
+        f"/admin/tournament/{tournament_id}",
+        f"/admin/match/{match_id}",
+        f"/tournament/{tournament_id}",
+        f"/api/tournament/{tournament_id}/bracket",
+        f"/tournament/{tournament_id}/bracket.svg",
+        "/api/participants/search?q=al",
+        "/admin/csv-download/matches",
+    ]
+
+    for route in routes:
+        def get():
+            response = client.get(route)
+            # "/" redirects to the latest tournament once there is one
+            assert response.status_code < 400, f"{route} returned {response.status_code}"
+            response.get_data()  # drain streamed downloads
+
+        # The first request parses the tables and fills the caches
+        start = time.perf_counter()
+        get()
+        cold_ms = round((time.perf_counter() - start) * 1000, 3)
+        results[f"GET {route}"] = dict(measure(get, repeat), cold_ms=cold_ms)
+
+
+def bench_match_advancement(results, client, repeat):
+    from utils import get_matches
+
+    # Each score is entered on a different playable match that feeds a next one
+    playable = [
+        m["id"] for m in get_matches()
+        if m["status"] == "pending" and m["team1_id"] and m["team2_id"] and m["next_match_id"]
+    ][:repeat]
+    if not playable:
+        print("  no playable matches; skipping match_view advancement")
+        return
+
+    remaining = iter(playable)
+
+    def post():
+        match_id = next(remaining)
+        response = client.post(f"/admin/match/{match_id}",
+                               data={"team1_score": "21", "team2_score": "15"})
+        assert response.status_code == 302, f"match {match_id} returned {response.status_code}"
+
+    results["POST /admin/match/<id> (advance)"] = measure(post, len(playable))
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against a baseline run; return the names that regressed."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        slower = (ratio > 1 + tolerance
+                  and result["median_ms"] - before["median_ms"] > MIN_REGRESSION_MS)
+        if slower:
+            regressions.append(name)
+        print(f"  {name:<56} {before['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms"
+              f"  {ratio:6.2f}x{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_scale_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bracket-sizes", default="8,64,256",
+                        help="Comma-separated team counts for the bracket generators")
+    parser.add_argument("--filter", default="",
+                        help="Only keep results whose name contains this text")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Fail if a median is this fraction slower than in --compare")
+    args = parser.parse_args()
+
+    # Paths given on the command line are relative to where we were started
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    work_dir = tempfile.mkdtemp(prefix="mcc-bench-")
+    counts = generate_data(os.path.join(work_dir, "data"), args.participants, args.teams,
+                           args.tournaments, args.teams_per_tournament, args.seed)
+
+    # The app resolves data/ relative to the working directory
+    os.chdir(work_dir)
+    os.environ.setdefault("ADMIN_USERNAME", "bench")
+    os.environ.setdefault("ADMIN_PASSWORD", "bench")
+    os.environ.setdefault("BACKUP_ENABLED", "false")
+    sys.path.insert(0, REPO_ROOT)
+    from app import app
+
+    app.config["WTF_CSRF_ENABLED"] = False
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin_logged_in"] = True
+
+    print(f"{', '.join(f'{count} {table}' for table, count in counts.items())}; "
+          f"median of {args.repeat}")
+    results = {}
+    bench_storage(results, args.repeat)
+    bench_brackets(results, args.repeat, [int(size) for size in args.bracket_sizes.split(",")])
+    bench_routes(results, client, args.repeat)
+    # Last, since it changes the data the other benchmarks read
+    bench_match_advancement(results, client, args.repeat)
+    results = {name: result for name, result in results.items() if args.filter in name}
+
+    for name, result in results.items():
+        cold = f"  (cold {result['cold_ms']:.2f})" if "cold_ms" in result else ""
+        print(f"  {name:<56} {result['median_ms']:9.2f} ms{cold}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": _git_commit(),
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "scale": dict(counts, teams_per_tournament=args.teams_per_tournament,
+                              seed=args.seed),
+                "results": results,
+            }, f, indent=2)
+        print(f"Wrote {output}")
+
+    if baseline is not None:
+        print(f"Compared with {args.compare}:")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Synthetic data/ directories for benchmarks and for reproducing slow pages.
+
+Writes participants, teams, tournaments of all three formats and their
+matches. Completed tournaments have every match played, active ones their
+first round, pending ones none. The same seed always gives the same data.
+Run from the repository root:
+
+    python benchmarks/synthetic_data.py /tmp/mcc-large/data --participants 20000 --teams 10000
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOURNAMENT_TYPES = ["single_elimination", "double_elimination", "round_robin"]
+
+FIRST_NAMES = ["Alex", "Blake", "Casey", "Dana", "Emery", "Finley", "Gray", "Harper",
+               "Indy", "Jordan", "Kai", "Logan", "Morgan", "Noel", "Quinn", "Riley"]
+LAST_NAMES = ["Adams", "Baker", "Clark", "Davis", "Evans", "Foster", "Garcia", "Hughes",
+              "Irwin", "Jones", "Klein", "Lopez", "Moore", "Nash", "Owens", "Price"]
+
+
+def _write_table(data_dir, table, rows):
+    from schema import TABLE_HEADERS
+
+    with open(os.path.join(data_dir, f"{table}.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_HEADERS[table])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _play(matches, rng, rounds=None):
+    """Score every playable match (optionally only in the given rounds) and advance winners."""
+    by_id = {match["id"]: match for match in matches}
+    for match in sorted(matches, key=lambda m: int(m["round"])):
+        if rounds is not None and match["round"] not in rounds:
+            continue
+        if match["status"] != "pending" or not match["team1_id"] or not match["team2_id"]:
+            continue
+        winner_score, loser_score = 21, rng.randint(0, 20)
+        if rng.random() < 0.5:
+            match["team1_score"], match["team2_score"] = str(winner_score), str(loser_score)
+            match["winner_id"] = match["team1_id"]
+        else:
+            match["team1_score"], match["team2_score"] = str(loser_score), str(winner_score)
+            match["winner_id"] = match["team2_id"]
+        match["status"] = "completed"
+
+        next_match = by_id.get(match["next_match_id"])
+        if next_match:
+            slot = "team1_id" if match["next_match_position"] == "1" else "team2_id"
+            next_match[slot] = match["winner_id"]
+
+
+def generate_data(data_dir, participants=1000, teams=500, tournaments=30,
+                  teams_per_tournament=16, seed=1):
+    """Write a synthetic data directory and return the row count of each table."""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from utils import generate_tournament_bracket
+    from schema import SCHEMA_VERSION
+
+    os.makedirs(data_dir, exist_ok=True)
+    rng = random.Random(seed)
+    # The bracket generators shuffle with the module-level generator
+    random.seed(seed)
+    created_at = "2025-05-05 12:00:00"
+
+    team_rows = []
+    for i in range(1, teams + 1):
+        # Every tenth team still has a TBD name
+        team_rows.append({"id": str(i), "name": "TBD" if i % 10 == 0 else f"Team {i}",
+                          "created_at": created_at})
+
+    participant_rows = []
+    for i in range(1, participants + 1):
+        team_id = (i + 1) // 2
+        team_id = str(team_id) if team_id <= teams else ""
+        participant_rows.append({
+            "id": str(i),
+            "first_name": f"{rng.choice(FIRST_NAMES)}{i}",
+            "last_name": rng.choice(LAST_NAMES),
+            "team_id": team_id,
+            "needs_teammate": str(not team_id),
+            "created_at": created_at
+        })
+
+    tournament_rows = []
+    match_rows = []
+    team_ids = [team["id"] for team in team_rows]
+    for i in range(1, tournaments + 1):
+        tournament_id = str(i)
+        tournament_type = TOURNAMENT_TYPES[(i - 1) % len(TOURNAMENT_TYPES)]
+        # Oldest third completed, middle third active, newest third pending
+        status = ["completed", "active", "pending"][min(3 * (i - 1) // tournaments, 2)]
+        tournament_rows.append({
+            "id": tournament_id,
+            "name": f"Tournament {i}",
+            "type": tournament_type,
+            "status": status,
+            "created_at": f"2025-{1 + (i - 1) * 12 // tournaments:02d}-01 12:00:00"
+        })
+
+        entrants = rng.sample(team_ids, min(teams_per_tournament, len(team_ids)))
+        if len(entrants) < 2:
+            continue
+        matches = generate_tournament_bracket(tournament_id, tournament_type, list(entrants))
+        if status == "completed":
+            _play(matches, rng)
+        elif status == "active":
+            _play(matches, rng, rounds={"1"})
+        match_rows.extend(matches)
+
+    _write_table(data_dir, "participants", participant_rows)
+    _write_table(data_dir, "teams", team_rows)
+    _write_table(data_dir, "tournaments", tournament_rows)
+    _write_table(data_dir, "matches", match_rows)
+    # Already in the current layout, so the app has nothing to migrate
+    with open(os.path.join(data_dir, ".schema_version"), "w", encoding="utf-8") as f:
+        f.write(str(SCHEMA_VERSION))
+    return {
+        "participants": len(participant_rows),
+        "teams": len(team_rows),
+        "tournaments": len(tournament_rows),
+        "matches": len(match_rows),
+    }
+
+
+def add_scale_arguments(parser):
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--teams", type=int, default=500)
+    parser.add_argument("--tournaments", type=int, default=30)
+    parser.add_argument("--teams-per-tournament", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("data_dir", help="Directory to write the CSV files to")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    counts = generate_data(args.data_dir, args.participants, args.teams, args.tournaments,
+                           args.teams_per_tournament, args.seed)
+    print(", ".join(f"{count} {table}" for table, count in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
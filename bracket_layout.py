@@ -0,0 +1,232 @@
+import hashlib
+import json
+import threading
+from markupsafe import escape
+
+from match_journal import JOURNAL_PATH
+from metrics import metrics
+from utils import data_version, get_teams, get_tournament_by_id, get_tournament_matches
+
+
+# Default geometry in CSS pixels; templates can override any of these
+CARD_WIDTH = 220
+CARD_HEIGHT = 160
+COLUMN_GAP = 48
+SLOT_GAP = 16
+HEADER_HEIGHT = 56
+
+
+def _int_or_zero(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def compute_bracket_layout(matches, card_width=CARD_WIDTH, card_height=CARD_HEIGHT,
+                           column_gap=COLUMN_GAP, slot_gap=SLOT_GAP, header_height=HEADER_HEIGHT):
+    """
+    Compute card coordinates and connector paths for a tournament's matches.
+
+    Rounds become columns. First-round matches are stacked in match order and
+    every later match is centred on the matches that feed into it, so the
+    whole layout is built in one pass over the matches per round.
+    """
+    rounds = {}
+    for match in matches:
+        rounds.setdefault(_int_or_zero(match.get("round")), []).append(match)
+
+    # Feeders of each match, from the next_match_id links
+    feeders = {}
+    for match in matches:
+        if match.get("next_match_id"):
+            feeders.setdefault(match["next_match_id"], []).append(match["id"])
+
+    positions = {}
+    columns = []
+    height = header_height
+
+    for column, round_num in enumerate(sorted(rounds)):
+        x = column * (card_width + column_gap)
+        columns.append({"round": str(round_num), "x": x})
+
+        round_matches = sorted(
+            rounds[round_num],
+            key=lambda m: (_int_or_zero(m.get("match_number")), m["id"])
+        )
+
+        next_free_y = header_height
+        for slot, match in enumerate(round_matches):
+            feeder_ys = [positions[f]["y"] for f in feeders.get(match["id"], []) if f in positions]
+            if feeder_ys:
+                y = sum(feeder_ys) / len(feeder_ys)
+            else:
+                y = next_free_y
+            # Never overlap the card above in the same column
+            y = max(y, next_free_y)
+
+            positions[match["id"]] = {"x": x, "y": y, "round": str(round_num), "slot": slot}
+            next_free_y = y + card_height + slot_gap
+            height = max(height, y + card_height)
+
+    connectors = []
+    for match in matches:
+        target = positions.get(match.get("next_match_id"))
+        if not target:
+            continue
+        source = positions[match["id"]]
+
+        start_x = source["x"] + card_width
+        start_y = source["y"] + card_height / 2
+        end_x = target["x"]
+        # Position 1 enters the top half of the card, position 2 the bottom half
+        if match.get("next_match_position") == "1":
+            end_y = target["y"] + card_height * 0.25
+        else:
+            end_y = target["y"] + card_height * 0.75
+        mid_x = start_x + (end_x - start_x) / 2
+
+        connectors.append({
+            "from": match["id"],
+            "to": match["next_match_id"],
+            "position": match.get("next_match_position", ""),
+            "d": (f"M {start_x:g} {start_y:g} C {mid_x:g} {start_y:g}, "
+                  f"{mid_x:g} {end_y:g}, {end_x:g} {end_y:g}")
+        })
+
+    width = columns[-1]["x"] + card_width if columns else 0
+
+    return {
+        "width": width,
+        "height": height,
+        "card_width": card_width,
+        "card_height": card_height,
+        "header_height": header_height,
+        "columns": columns,
+        "matches": positions,
+        "connectors": connectors
+    }
+
+
+# Geometry used for the static SVG export: compact two-line cards
+SVG_CARD_WIDTH = 220
+SVG_CARD_HEIGHT = 64
+SVG_MARGIN = 24
+
+# Rendered SVGs keyed by tournament id: (file stamp, content digest, svg)
+_svg_cache = {}
+_svg_cache_lock = threading.Lock()
+
+
+def round_label(tournament_type, round_num, round_count):
+    """Display name of a round, matching the bracket page headings."""
+    if tournament_type != "round_robin":
+        if round_num == round_count:
+            return "Final"
+        if round_num == round_count - 1:
+            return "Semifinals"
+        if round_num == round_count - 2:
+            return "Quarterfinals"
+    return f"Round {round_num}"
+
+
+def render_bracket_svg(tournament, matches, team_dict):
+    """Render a tournament bracket as a standalone SVG document."""
+    layout = compute_bracket_layout(
+        matches, card_width=SVG_CARD_WIDTH, card_height=SVG_CARD_HEIGHT,
+        slot_gap=12, header_height=40
+    )
+    width = layout["width"] + 2 * SVG_MARGIN
+    height = layout["height"] + 2 * SVG_MARGIN + 40
+    round_count = len(layout["columns"])
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}" height="{height:g}" '
+        f'viewBox="0 0 {width:g} {height:g}" font-family="Helvetica, Arial, sans-serif">',
+        f'<rect width="100%" height="100%" fill="#1a1a1a"/>',
+        f'<text x="{SVG_MARGIN}" y="{SVG_MARGIN + 20}" fill="#ffffff" font-size="22" '
+        f'font-weight="bold">{escape(tournament.get("name", ""))}</text>',
+        f'<g transform="translate({SVG_MARGIN},{SVG_MARGIN + 40})">'
+    ]
+
+    for column in layout["columns"]:
+        label = round_label(tournament.get("type"), _int_or_zero(column["round"]), round_count)
+        parts.append(
+            f'<text x="{column["x"] + SVG_CARD_WIDTH / 2:g}" y="20" fill="#adb5bd" font-size="14" '
+            f'text-anchor="middle">{escape(label)}</text>'
+        )
+
+    if layout["connectors"]:
+        path = " ".join(c["d"] for c in layout["connectors"])
+        parts.append(f'<path d="{path}" stroke="#0dcaf0" stroke-width="2" fill="none"/>')
+
+    for match in matches:
+        position = layout["matches"][match["id"]]
+        x, y = position["x"], position["y"]
+        if match.get("status") == "completed":
+            accent = "#28a745"
+        elif match.get("team1_id") and match.get("team2_id"):
+            accent = "#17a2b8"
+        else:
+            accent = "#6c757d"
+
+        parts.append(
+            f'<rect x="{x:g}" y="{y:g}" width="{SVG_CARD_WIDTH}" height="{SVG_CARD_HEIGHT}" rx="4" '
+            f'fill="#2b2b2b" stroke="#495057"/>'
+            f'<rect x="{x:g}" y="{y:g}" width="4" height="{SVG_CARD_HEIGHT}" fill="{accent}"/>'
+        )
+
+        for line, side in enumerate(("team1", "team2")):
+            team_id = match.get(f"{side}_id", "")
+            name = team_dict.get(team_id, "TBD") if team_id else "TBD"
+            score = match.get(f"{side}_score") or "-"
+            is_winner = bool(team_id) and match.get("winner_id") == team_id
+            fill = "#ffc107" if is_winner else ("#ffffff" if team_id else "#6c757d")
+            weight = ' font-weight="bold"' if is_winner else ""
+            text_y = y + 26 + line * 24
+            parts.append(
+                f'<text x="{x + 14:g}" y="{text_y:g}" fill="{fill}" font-size="14"{weight}>'
+                f'{escape(name)}</text>'
+                f'<text x="{x + SVG_CARD_WIDTH - 12:g}" y="{text_y:g}" fill="{fill}" font-size="14" '
+                f'text-anchor="end"{weight}>{escape(score)}</text>'
+            )
+
+    parts.append("</g></svg>")
+    return "".join(parts)
+
+
+def get_bracket_svg(tournament_id):
+    """
+    Return (svg, digest) for a tournament, or (None, None) if it doesn't exist.
+
+    The data files are only re-read when one of them changed on disk, and the
+    SVG is only re-rendered when this tournament's own rows changed.
+    """
+    stamp = data_version("data/tournaments.csv", "data/matches.csv", "data/teams.csv", JOURNAL_PATH)
+    cached = _svg_cache.get(tournament_id)
+    if cached and cached[0] == stamp:
+        metrics.record_cache("bracket_svg", True)
+        return cached[2], cached[1]
+
+    tournament = get_tournament_by_id(tournament_id)
+    if not tournament:
+        return None, None
+
+    matches = get_tournament_matches(tournament_id)
+    team_ids = {m[key] for m in matches for key in ("team1_id", "team2_id") if m[key]}
+    team_dict = {t["id"]: t["name"] for t in get_teams() if t["id"] in team_ids}
+
+    digest = hashlib.sha1(
+        json.dumps([tournament, matches, team_dict], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    with _svg_cache_lock:
+        cached = _svg_cache.get(tournament_id)
+        if cached and cached[1] == digest:
+            svg = cached[2]
+        else:
+            svg = render_bracket_svg(tournament, matches, team_dict)
+        metrics.record_cache("bracket_svg", cached is not None and cached[1] == digest)
+        _svg_cache[tournament_id] = (stamp, digest, svg)
+
+    return svg, digest
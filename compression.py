@@ -0,0 +1,106 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+
+# Only dynamic pages, API payloads and generated images are compressed here;
+# static assets are left to the web server / CDN in front of the app.
+COMPRESSIBLE_MIMETYPES = {"text/html", "application/json", "image/svg+xml"}
+
+
+class CompressionCache:
+    """Small thread-safe LRU of compressed bodies keyed by ETag and level."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+compression_cache = CompressionCache()
+
+
+def init_compression(app):
+    """Register gzip compression of HTML and JSON responses on the app."""
+    app.config.setdefault("COMPRESS_ENABLED", os.environ.get("COMPRESS_ENABLED", "true").lower() != "false")
+    app.config.setdefault("COMPRESS_LEVEL", int(os.environ.get("COMPRESS_LEVEL", "6")))
+    app.config.setdefault("COMPRESS_MIN_SIZE", int(os.environ.get("COMPRESS_MIN_SIZE", "500")))
+    app.config.setdefault("COMPRESS_CACHE_SIZE", int(os.environ.get("COMPRESS_CACHE_SIZE", "128")))
+
+    compression_cache.max_entries = app.config["COMPRESS_CACHE_SIZE"]
+
+    @app.after_request
+    def compress_response(response):
+        return compress(response, app.config)
+
+
+def compress(response, config):
+    """Gzip a response body in place, reusing cached bodies for known ETags."""
+    if not config["COMPRESS_ENABLED"]:
+        return response
+
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    # The body depends on Accept-Encoding from here on, so caches must know
+    response.vary.add("Accept-Encoding")
+
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers):
+        return response
+
+    if request.accept_encodings.quality("gzip") <= 0:
+        return response
+
+    data = response.get_data()
+    if len(data) < config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    # The ETag identifies the uncompressed body; the gzip variant gets its own
+    etag, is_weak = response.get_etag()
+    if not etag:
+        response.add_etag()
+        etag, is_weak = response.get_etag()
+
+    level = config["COMPRESS_LEVEL"]
+    cache_key = (etag, level)
+    compressed = compression_cache.get(cache_key)
+    if compressed is None:
+        # mtime=0 keeps the output deterministic for identical bodies
+        compressed = gzip.compress(data, compresslevel=level, mtime=0)
+        compression_cache.put(cache_key, compressed)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(f"{etag}-gzip", weak=is_weak)
+
+    # Spectators polling an unchanged bracket get a bodiless 304
+    return response.make_conditional(request)
@@ -0,0 +1,129 @@
+import csv
+import io
+import os
+import time
+import zipfile
+
+from match_journal import match_journal
+from utils import data_write_lock, get_matches, read_csv_header
+from schema import TABLE_PATHS
+
+EXPORT_TABLES = TABLE_PATHS
+
+# Bytes read from disk per chunk of a streamed response
+CHUNK_SIZE = 64 * 1024
+
+
+def open_snapshot(tables):
+    """
+    Open the data files for a set of tables as one point-in-time snapshot.
+
+    Writers replace files atomically under the data write lock, so files
+    opened together under that lock keep their contents for as long as the
+    handles stay open, however many writes happen meanwhile. The lock is
+    only held for the open() calls. While match results are still in the
+    journal, matches are exported from memory with them applied, so a
+    download never writes anything.
+    """
+    handles = {}
+    with data_write_lock():
+        for table in tables:
+            if table == "matches" and match_journal.pending_events():
+                # matches.csv lacks the results still in the journal; rather
+                # than compacting (a write) they are applied in memory
+                handles[table] = _matches_with_journal()
+                continue
+            try:
+                handles[table] = open(EXPORT_TABLES[table], "rb")
+            except FileNotFoundError:
+                handles[table] = None
+    return handles
+
+
+def _matches_with_journal():
+    """matches.csv with the journal's pending changes applied, as an in-memory file."""
+    rows = get_matches()
+    fieldnames = read_csv_header(EXPORT_TABLES["matches"]) or []
+    fieldnames += [field for field in (rows[0] if rows else {}) if field not in fieldnames]
+    text = io.StringIO(newline="")
+    writer = csv.DictWriter(text, fieldnames=fieldnames, restval="", extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return io.BytesIO(text.getvalue().encode("utf-8"))
+
+
+def snapshot_size(handle):
+    """Size in bytes of a snapshot handle, file or in-memory."""
+    if isinstance(handle, io.BytesIO):
+        return len(handle.getbuffer())
+    return os.fstat(handle.fileno()).st_size
+
+
+def _modified_time(handle):
+    if isinstance(handle, io.BytesIO):
+        return time.localtime()[:6]
+    return time.localtime(os.fstat(handle.fileno()).st_mtime)[:6]
+
+
+def stream_file(handle):
+    """Yield a file's contents in chunks and close it afterwards."""
+    try:
+        while True:
+            chunk = handle.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        handle.close()
+
+
+class _ZipOutput:
+    """Write-only, unseekable sink that collects zip output for a generator to yield."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(handles):
+    """
+    Yield a ZIP archive of the snapshot handles, built on the fly.
+
+    zipfile writes data descriptors when its output isn't seekable, so the
+    archive is produced chunk by chunk without a temporary file.
+    """
+    output = _ZipOutput()
+    try:
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for table, handle in handles.items():
+                if handle is None:
+                    continue
+                info = zipfile.ZipInfo(f"{table}.csv", date_time=_modified_time(handle))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with archive.open(info, "w") as entry:
+                    for chunk in stream_file(handle):
+                        entry.write(chunk)
+                        data = output.drain()
+                        if data:
+                            yield data
+        yield output.drain()
+    finally:
+        for handle in handles.values():
+            if handle is not None and not handle.closed:
+                handle.close()
@@ -0,0 +1,276 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+
+from utils import data_write_lock, normalize_name, read_csv_header, table_rows
+from id_allocator import advance_counter, next_id
+from data_versions import table_versions
+
+# Import modes:
+#   replace - the upload becomes the whole table (the original behaviour)
+#   merge   - rows not already present are added, existing rows are kept as-is
+#   upsert  - rows not already present are added, existing rows are updated
+IMPORT_MODES = ["replace", "merge", "upsert"]
+
+# Rows are matched against existing data either by id or by normalized name
+IMPORT_KEYS = ["id", "name"]
+
+IMPORT_SPECS = {
+    "participants": {
+        "path": "data/participants.csv",
+        "required_headers": ["id", "first_name", "last_name", "team_id", "created_at"],
+        "required_values": ["first_name", "last_name"],
+        "name_fields": ["first_name", "last_name"],
+        "defaults": {"needs_teammate": "False"},
+    },
+    "teams": {
+        "path": "data/teams.csv",
+        "required_headers": ["id", "name", "created_at"],
+        "required_values": ["name"],
+        "name_fields": ["name"],
+        "defaults": {},
+    },
+}
+
+# Rows are buffered and written this many at a time
+CHUNK_SIZE = 1000
+
+# Only the first errors are kept for the report; the rest are just counted
+MAX_REPORTED_ERRORS = 50
+
+
+class CsvImportError(ValueError):
+    """Raised when an upload can't be imported at all, e.g. missing headers."""
+
+
+def _row_key(row, key, spec):
+    if key == "id":
+        return row.get("id", "")
+    return normalize_name(*(row.get(field, "") for field in spec["name_fields"]))
+
+
+def _new_result():
+    return {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0, "error_count": 0, "errors": []}
+
+
+def _add_error(result, line_number, message):
+    result["error_count"] += 1
+    if len(result["errors"]) < MAX_REPORTED_ERRORS:
+        result["errors"].append(f"line {line_number}: {message}")
+
+
+def _validated_rows(reader, key, mode, spec, result, seen_ids):
+    """
+    Yield cleaned upload rows, recording per-row errors instead of aborting.
+
+    Every non-empty id seen is recorded in seen_ids; a repeated id is an
+    error whatever the rows are matched by.
+    """
+    seen_keys = {}
+    for row in reader:
+        line_number = reader.line_num
+        result["rows"] += 1
+
+        if None in row:
+            _add_error(result, line_number, "too many columns")
+            continue
+        if any(value is None for value in row.values()):
+            _add_error(result, line_number, "too few columns")
+            continue
+
+        clean_row = {field: value.strip() for field, value in row.items()}
+        for field, default in spec["defaults"].items():
+            clean_row.setdefault(field, default)
+
+        missing = [field for field in spec["required_values"] if not clean_row.get(field)]
+        # Merging by id needs the id to match on; otherwise missing ids are allocated
+        if key == "id" and mode != "replace" and not clean_row.get("id"):
+            missing.insert(0, "id")
+        if missing:
+            _add_error(result, line_number, f"missing {', '.join(missing)}")
+            continue
+
+        row_id = clean_row.get("id", "")
+        if row_id and row_id in seen_ids:
+            _add_error(result, line_number, f"duplicate id {row_id} of line {seen_ids[row_id]}")
+            continue
+        if key != "id":
+            row_key = _row_key(clean_row, key, spec)
+            if row_key in seen_keys:
+                _add_error(result, line_number, f"duplicate of line {seen_keys[row_key]}")
+                continue
+            seen_keys[row_key] = line_number
+        if row_id:
+            seen_ids[row_id] = line_number
+
+        yield clean_row
+
+
+def _fill_missing_ids(table, spool_path, fieldnames, seen_ids):
+    """Give spooled rows without an id a newly allocated one, streaming into a new spool file."""
+    output = _temp_csv(os.path.dirname(spool_path))
+    with output, open(spool_path, "r", newline="", encoding="utf-8") as spooled:
+        writer = csv.DictWriter(output, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in csv.DictReader(spooled):
+            if not row["id"]:
+                # Skip ids that rows further on in the upload already use
+                row["id"] = next_id(table)
+                while row["id"] in seen_ids:
+                    row["id"] = next_id(table)
+            writer.writerow(row)
+    os.replace(output.name, spool_path)
+
+
+def _write_chunked(writer, rows):
+    """Write rows through a csv writer CHUNK_SIZE rows at a time and return the count."""
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            writer.writerows(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+
+def _temp_csv(directory):
+    return tempfile.NamedTemporaryFile(
+        "w", newline="", encoding="utf-8", dir=directory, suffix=".csv.tmp", delete=False
+    )
+
+
+def import_csv(table, file_stream, mode="replace", key="id"):
+    """
+    Stream an uploaded CSV into a table and return a summary of what happened.
+
+    The upload is decoded and validated row by row straight from the file
+    stream and spooled to a temporary file in chunks, so memory use doesn't
+    grow with the size of the upload. Invalid rows are reported and skipped.
+    The table itself is only locked and rewritten once the whole upload has
+    been validated.
+    """
+    spec = IMPORT_SPECS[table]
+    if mode not in IMPORT_MODES:
+        raise CsvImportError(f"Unknown import mode '{mode}'")
+    if key not in IMPORT_KEYS:
+        raise CsvImportError(f"Unknown import key '{key}'")
+
+    path = spec["path"]
+    data_dir = os.path.dirname(path)
+    result = _new_result()
+
+    text = io.TextIOWrapper(file_stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    headers = reader.fieldnames or []
+    missing_headers = [h for h in spec["required_headers"] if h not in headers]
+    if missing_headers:
+        raise CsvImportError(f"missing required headers: {', '.join(missing_headers)}")
+
+    upload_fields = list(headers) + [f for f in spec["defaults"] if f not in headers]
+
+    # Phase 1: validate the upload into a spool file, without holding any lock
+    spool = _temp_csv(data_dir)
+    try:
+        with spool:
+            writer = csv.DictWriter(spool, fieldnames=upload_fields)
+            writer.writeheader()
+            # An unreadable file can't be partially trusted, so nothing is applied
+            valid_rows = 0
+            seen_ids = {}
+            try:
+                valid_rows = _write_chunked(writer, _validated_rows(reader, key, mode, spec, result, seen_ids))
+            except UnicodeDecodeError as e:
+                _add_error(result, reader.line_num + 1, f"file is not valid UTF-8 ({e.reason}); nothing was imported")
+            except csv.Error as e:
+                _add_error(result, reader.line_num, f"malformed CSV ({e}); nothing was imported")
+
+        if valid_rows == 0:
+            return result
+
+        # Phase 2: apply the validated rows to the table under the write lock
+        with data_write_lock():
+            # Ids allocated from now on, here or later, must skip the imported ones
+            advance_counter(table, seen_ids)
+            if mode == "replace":
+                if len(seen_ids) < valid_rows:
+                    _fill_missing_ids(table, spool.name, upload_fields, seen_ids)
+                os.replace(spool.name, path)
+                table_versions.bump(path)
+                result["inserted"] = valid_rows
+            else:
+                _merge_into_table(table, spool.name, key, mode == "upsert", upload_fields, result)
+    finally:
+        if os.path.exists(spool.name):
+            os.remove(spool.name)
+
+    return result
+
+
+def _merge_into_table(table, spool_path, key, update_existing, upload_fields, result):
+    """Merge spooled rows into the table file, rewriting it atomically."""
+    spec = IMPORT_SPECS[table]
+    path = spec["path"]
+    existing = table_rows(path)
+    fieldnames = read_csv_header(path) or []
+    fieldnames += [f for f in upload_fields if f not in fieldnames]
+
+    positions = {_row_key(row, key, spec): i for i, row in enumerate(existing)}
+    used_ids = {row.get("id") for row in existing}
+    data_dir = os.path.dirname(path)
+
+    # New rows go to a second spool file while updates are applied in memory,
+    # so existing rows can be written first and new ones streamed after them
+    new_rows = _temp_csv(data_dir)
+    output = None
+    try:
+        with new_rows, open(spool_path, "r", newline="", encoding="utf-8") as spooled:
+            new_writer = csv.DictWriter(new_rows, fieldnames=fieldnames, restval="")
+            new_writer.writeheader()
+            chunk = []
+            for row in csv.DictReader(spooled):
+                position = positions.get(_row_key(row, key, spec))
+                if position is not None:
+                    if update_existing:
+                        updates = dict(row)
+                        if key == "name":
+                            # Keep the existing id so references stay intact
+                            updates.pop("id", None)
+                        existing[position].update(updates)
+                        result["updated"] += 1
+                    else:
+                        result["skipped"] += 1
+                    continue
+
+                if not row.get("id") or row["id"] in used_ids:
+                    row["id"] = next_id(table)
+                used_ids.add(row["id"])
+                chunk.append(row)
+                result["inserted"] += 1
+                if len(chunk) >= CHUNK_SIZE:
+                    new_writer.writerows(chunk)
+                    chunk = []
+            if chunk:
+                new_writer.writerows(chunk)
+
+        output = _temp_csv(data_dir)
+        with output, open(new_rows.name, "r", newline="", encoding="utf-8") as appended:
+            writer = csv.DictWriter(output, fieldnames=fieldnames, restval="", extrasaction="ignore")
+            writer.writeheader()
+            _write_chunked(writer, existing)
+            next(appended)  # header
+            shutil.copyfileobj(appended, output)
+
+        os.replace(output.name, path)
+        table_versions.bump(path)
+    finally:
+        for temp in (new_rows, output):
+            if temp is not None and os.path.exists(temp.name):
+                os.remove(temp.name)
+
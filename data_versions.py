@@ -0,0 +1,72 @@
+import logging
+import mmap
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+# One 64-bit generation counter per table, in a small file that every
+# gunicorn worker maps into memory. Writers bump a table's counter after
+# replacing its file, so readers can tell what changed with a memory read
+# instead of a stat() per table per request.
+VERSIONS_FILE = "data/.versions"
+TABLE_SLOTS = {
+    "data/participants.csv": 0,
+    "data/teams.csv": 1,
+    "data/tournaments.csv": 2,
+    "data/matches.csv": 3,
+}
+SLOT_FORMAT = "<Q"
+SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+
+
+class VersionCounters:
+    """Per-table generation counters in a shared memory-mapped file."""
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        self._map = None
+
+    def _mapping(self):
+        if self._map is None:
+            size = SLOT_SIZE * len(self.slots)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if os.fstat(fd).st_size < size:
+                        os.ftruncate(fd, size)
+                    self._map = mmap.mmap(fd, size)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.error(f"Could not map version counters {self.path}: {e}")
+                return None
+        return self._map
+
+    def get(self, file_path):
+        """Current generation of a table, or None if it isn't tracked."""
+        slot = self.slots.get(file_path)
+        mapping = self._mapping() if slot is not None else None
+        if mapping is None:
+            return None
+        return struct.unpack_from(SLOT_FORMAT, mapping, slot * SLOT_SIZE)[0]
+
+    def bump(self, file_path):
+        """
+        Advance a table's generation and return the new value.
+
+        Callers must hold the data write lock, which makes the
+        read-increment-write atomic across workers.
+        """
+        slot = self.slots.get(file_path)
+        mapping = self._mapping() if slot is not None else None
+        if mapping is None:
+            return None
+        generation = struct.unpack_from(SLOT_FORMAT, mapping, slot * SLOT_SIZE)[0] + 1
+        struct.pack_into(SLOT_FORMAT, mapping, slot * SLOT_SIZE, generation)
+        return generation
+
+
+table_versions = VersionCounters(VERSIONS_FILE, TABLE_SLOTS)
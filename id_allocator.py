@@ -0,0 +1,110 @@
+import os
+import sys
+from collections import Counter
+
+from utils import file_lock, read_csv
+
+SEQUENCE_DIR = "data/.sequences"
+
+# Tables whose ids are minted by the app; match ids derive from tournament ids
+TABLES = {
+    "participants": "data/participants.csv",
+    "teams": "data/teams.csv",
+    "tournaments": "data/tournaments.csv",
+}
+
+
+def _max_numeric_id(rows):
+    return max((int(row["id"]) for row in rows if row.get("id", "").isdigit()), default=0)
+
+
+def _read_counter(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_counter(path, value):
+    # Write-then-rename so a crash leaves either the old or the new value
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(value))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def next_id(table):
+    """
+    Allocate the next id for a table.
+
+    The last issued id is kept in a counter file guarded by a file lock, so
+    ids are never reissued after a deletion and concurrent workers never get
+    the same id. The table is only scanned to seed a counter that doesn't
+    exist yet; the CSV importer advances the counter past imported ids.
+    """
+    counter_path = os.path.join(SEQUENCE_DIR, f"{table}.seq")
+    with file_lock(os.path.join(SEQUENCE_DIR, f"{table}.lock")):
+        last_id = _read_counter(counter_path)
+        if last_id is None:
+            last_id = _max_numeric_id(read_csv(TABLES[table]))
+        new_id = last_id + 1
+        _write_counter(counter_path, new_id)
+    return str(new_id)
+
+
+def advance_counter(table, ids):
+    """Make sure ids already in use (e.g. just imported) are never allocated."""
+    highest = max((int(id_) for id_ in ids if id_.isdigit()), default=0)
+    counter_path = os.path.join(SEQUENCE_DIR, f"{table}.seq")
+    with file_lock(os.path.join(SEQUENCE_DIR, f"{table}.lock")):
+        current = _read_counter(counter_path)
+        if current is None:
+            _write_counter(counter_path, max(highest, _max_numeric_id(read_csv(TABLES[table]))))
+        elif highest > current:
+            _write_counter(counter_path, highest)
+
+
+def validate_ids(table):
+    """Return a list of problems with a table's existing ids."""
+    rows = read_csv(TABLES[table])
+    problems = []
+
+    missing = [i for i, row in enumerate(rows, start=2) if not row.get("id")]
+    if missing:
+        problems.append(f"{table}: rows without an id on lines {', '.join(map(str, missing))}")
+
+    non_numeric = sorted({row["id"] for row in rows if row.get("id") and not row["id"].isdigit()})
+    if non_numeric:
+        problems.append(f"{table}: non-numeric ids {', '.join(non_numeric)}")
+
+    duplicates = sorted(id_ for id_, count in Counter(row.get("id") for row in rows).items()
+                        if id_ and count > 1)
+    if duplicates:
+        problems.append(f"{table}: duplicate ids {', '.join(duplicates)}")
+
+    return problems
+
+
+def migrate_ids():
+    """Validate existing ids and seed each table's counter from its highest id."""
+    os.makedirs(SEQUENCE_DIR, exist_ok=True)
+    problems = []
+    for table, file_path in TABLES.items():
+        problems.extend(validate_ids(table))
+        counter_path = os.path.join(SEQUENCE_DIR, f"{table}.seq")
+        with file_lock(os.path.join(SEQUENCE_DIR, f"{table}.lock")):
+            current = _read_counter(counter_path) or 0
+            highest = _max_numeric_id(read_csv(file_path))
+            _write_counter(counter_path, max(current, highest))
+    return problems
+
+
+if __name__ == "__main__":
+    issues = migrate_ids()
+    for issue in issues:
+        print(issue)
+    print("ID counters seeded." if not issues else f"ID counters seeded with {len(issues)} problem(s) found.")
+    sys.exit(1 if issues else 0)
@@ -1,4 +1,14 @@
+import os
+
 from app import app
+from utils import preload_tables
+from schema import migrate
+
+# With `PRELOAD_DATA=1 gunicorn --preload main:app` the data set is loaded
+# once in the master process and shared copy-on-write by every worker
+if os.environ.get("PRELOAD_DATA", "").lower() in ("1", "true", "yes"):
+    migrate()
+    preload_tables()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
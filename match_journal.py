@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Match results are recorded as events appended to a journal instead of
+# rewriting matches.csv on every score. matches.csv holds the state as of
+# the last compaction; the journal holds every change since then. Compacted
+# journals are archived rather than deleted, so the full history is kept.
+JOURNAL_PATH = "data/matches.journal"
+ARCHIVE_DIR = "data/.journal"
+
+EVENT_TYPES = ["score_set", "winner_advanced", "correction"]
+
+# The journal is folded back into matches.csv once it holds
+# JOURNAL_COMPACT_EVENTS events (500 by default), or once its oldest event is
+# JOURNAL_COMPACT_INTERVAL seconds old (3600). Both are read when checked, so
+# settings from .env apply however the module was imported.
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Which tournaments and matches each archive holds, so history lookups only
+# read the archives that matter. Archives never change once written; each
+# entry carries the file's size and mtime so one replaced by a restore is
+# indexed again.
+ARCHIVE_INDEX_NAME = "index.json"
+
+
+def _read_events(path, offset=0):
+    """Return (events, end offset) for the complete lines of a journal file from offset."""
+    events = []
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return events, offset
+
+    # A line still being written has no newline yet and is left for next time
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            logger.warning(f"Skipping unreadable journal line in {path}")
+    return events, offset + end
+
+
+class MatchJournal:
+    """Append-only log of match changes, replayed on top of matches.csv."""
+
+    def __init__(self, path, archive_dir):
+        self.path = path
+        self.archive_dir = archive_dir
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = 0
+        self._events = []
+        self._overlay = {}
+        self._archive_lock = threading.Lock()
+        self._archive_index = None
+
+    def _refresh(self):
+        """Read whatever was appended since the last call, from any worker."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            stat = None
+
+        with self._lock:
+            if stat is None or stat.st_ino != self._inode or stat.st_size < self._offset:
+                # New or rotated journal: replay it from the start
+                self._inode = stat.st_ino if stat else None
+                self._offset = 0
+                self._events = []
+                self._overlay = {}
+            if stat is None or stat.st_size == self._offset:
+                return
+
+            events, self._offset = _read_events(self.path, self._offset)
+            for event in events:
+                self._events.append(event)
+                self._overlay.setdefault(event["match_id"], {}).update(event["set"])
+
+    def overlay(self):
+        """Field values changed since the last compaction, keyed by match id."""
+        self._refresh()
+        return self._overlay
+
+    def pending_events(self):
+        """Events recorded since the last compaction, oldest first."""
+        self._refresh()
+        return list(self._events)
+
+    def _archived_paths(self):
+        try:
+            names = sorted(n for n in os.listdir(self.archive_dir) if n.endswith(".journal"))
+        except OSError:
+            return []
+        return [os.path.join(self.archive_dir, name) for name in names]
+
+    @staticmethod
+    def _archive_range(path):
+        # Archive names are matches-<first seq>-<last seq>.journal
+        first, last = os.path.basename(path).split(".")[0].split("-")[1:]
+        return int(first), int(last)
+
+    @staticmethod
+    def _index_entry(path, events):
+        stat = os.stat(path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "tournaments": sorted({e.get("tournament_id", "") for e in events}),
+            "matches": sorted({e.get("match_id", "") for e in events}),
+        }
+
+    def _save_archive_index(self):
+        path = os.path.join(self.archive_dir, ARCHIVE_INDEX_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._archive_index, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Only an accelerator; missing entries are rebuilt from the archives
+            logger.error(f"Error writing journal archive index: {e}")
+
+    def _load_archive_index(self):
+        # Callers hold the archive lock
+        if self._archive_index is None:
+            try:
+                with open(os.path.join(self.archive_dir, ARCHIVE_INDEX_NAME), "r", encoding="utf-8") as f:
+                    self._archive_index = json.load(f)
+            except (OSError, ValueError):
+                self._archive_index = {}
+
+    def _indexed_archives(self):
+        """(path, index entry) of every archive, reading only archives not indexed yet."""
+        paths = self._archived_paths()
+        with self._archive_lock:
+            self._load_archive_index()
+            changed = False
+            indexed = []
+            for path in paths:
+                name = os.path.basename(path)
+                entry = self._archive_index.get(name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if entry is None or (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+                    entry = self._index_entry(path, _read_events(path)[0])
+                    self._archive_index[name] = entry
+                    changed = True
+                indexed.append((path, entry))
+
+            names = {os.path.basename(path) for path in paths}
+            for name in [n for n in self._archive_index if n not in names]:
+                del self._archive_index[name]
+                changed = True
+            if changed:
+                self._save_archive_index()
+        return indexed
+
+    def _next_seq(self):
+        if self._events:
+            return self._events[-1]["seq"] + 1
+        archived = self._archived_paths()
+        if not archived:
+            return 1
+        return self._archive_range(archived[-1])[1] + 1
+
+    def append(self, events, by=""):
+        """
+        Append events and return them with their sequence numbers.
+
+        Each event is a dict with type, match_id, tournament_id, set (the new
+        field values) and before (their previous values). Callers must hold
+        the data write lock, which keeps sequence numbers unique across workers.
+        """
+        self._refresh()
+        seq = self._next_seq()
+        at = datetime.now().strftime(TIMESTAMP_FORMAT)
+
+        recorded = []
+        for event in events:
+            if event["type"] not in EVENT_TYPES:
+                raise ValueError(f"Unknown journal event type '{event['type']}'")
+            recorded.append(dict(event, seq=seq, at=at, by=by))
+            seq += 1
+
+        lines = "".join(json.dumps(event, sort_keys=True) + "\n" for event in recorded)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+        return recorded
+
+    def needs_compaction(self):
+        """Whether the journal has grown or aged past its compaction threshold."""
+        events = self.pending_events()
+        if not events:
+            return False
+        if len(events) >= int(os.environ.get("JOURNAL_COMPACT_EVENTS", "500")):
+            return True
+        oldest = datetime.strptime(events[0]["at"], TIMESTAMP_FORMAT)
+        age = (datetime.now() - oldest).total_seconds()
+        return age >= int(os.environ.get("JOURNAL_COMPACT_INTERVAL", "3600"))
+
+    def rotate(self):
+        """
+        Archive the current journal after its events were written to matches.csv.
+
+        Callers must hold the data write lock.
+        """
+        events = self.pending_events()
+        if not events:
+            return
+        os.makedirs(self.archive_dir, exist_ok=True)
+        name = f"matches-{events[0]['seq']:010d}-{events[-1]['seq']:010d}.journal"
+        archive_path = os.path.join(self.archive_dir, name)
+        os.replace(self.path, archive_path)
+        # Index the new archive from the events in hand instead of re-reading it
+        with self._archive_lock:
+            self._load_archive_index()
+            self._archive_index[name] = self._index_entry(archive_path, events)
+            self._save_archive_index()
+        self._refresh()
+
+    def last_seq(self):
+        """Sequence number of the newest recorded event, 0 if there are none."""
+        self._refresh()
+        return self._next_seq() - 1
+
+    def events_since(self, seq):
+        """Events after seq, oldest first, reading only the archives that hold any."""
+        pending = self.pending_events()
+        if pending and pending[0]["seq"] <= seq + 1:
+            return [event for event in pending if event["seq"] > seq]
+
+        events = []
+        for path in self._archived_paths():
+            if self._archive_range(path)[1] > seq:
+                events.extend(event for event in _read_events(path)[0] if event["seq"] > seq)
+        events.extend(event for event in pending if event["seq"] > seq)
+        return events
+
+    def event(self, seq):
+        """The event numbered seq, or None; reads at most the one archive holding it."""
+        pending = self.pending_events()
+        if pending and pending[0]["seq"] <= seq:
+            return next((event for event in pending if event["seq"] == seq), None)
+        for path in self._archived_paths():
+            first, last = self._archive_range(path)
+            if first <= seq <= last:
+                return next((event for event in _read_events(path)[0] if event["seq"] == seq), None)
+        return None
+
+    def history(self, tournament_id=None, match_id=None, after=0):
+        """
+        Recorded events numbered above after, archived ones included, optionally filtered.
+
+        Only archives holding events for the tournament or match, and newer
+        than after, are read.
+        """
+        events = []
+        for path, entry in self._indexed_archives():
+            if self._archive_range(path)[1] <= after:
+                continue
+            if tournament_id is not None and tournament_id not in entry["tournaments"]:
+                continue
+            if match_id is not None and match_id not in entry["matches"]:
+                continue
+            events.extend(_read_events(path)[0])
+        events.extend(self.pending_events())
+        return [
+            event for event in events
+            if event["seq"] > after
+            and (tournament_id is None or event.get("tournament_id") == tournament_id)
+            and (match_id is None or event.get("match_id") == match_id)
+        ]
+
+
+match_journal = MatchJournal(JOURNAL_PATH, ARCHIVE_DIR)
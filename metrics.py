@@ -0,0 +1,228 @@
+import bisect
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Storage counters tracked per request and per endpoint
+IO_COUNTERS = ["csv_reads", "csv_writes", "bytes_read", "bytes_written"]
+IO_DESCRIPTIONS = {
+    "csv_reads": "CSV files parsed",
+    "csv_writes": "CSV files written or appended to",
+    "bytes_read": "Bytes of CSV parsed",
+    "bytes_written": "Bytes of CSV written",
+}
+
+
+class LatencyHistogram:
+    """Cumulative-style latency histogram with fixed buckets, like Prometheus'."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket, as histogram_quantile() does."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # beyond the last bucket: report its bound
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Request latency, storage I/O and cache counters for this worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.endpoints = {}
+        self.io_totals = dict.fromkeys(IO_COUNTERS, 0)
+        self.caches = {}
+
+    def _endpoint(self, name):
+        endpoint = self.endpoints.get(name)
+        if endpoint is None:
+            endpoint = {"latency": LatencyHistogram(), "errors": 0, "io": dict.fromkeys(IO_COUNTERS, 0)}
+            self.endpoints[name] = endpoint
+        return endpoint
+
+    def record_request(self, name, seconds, status_code, io):
+        with self._lock:
+            endpoint = self._endpoint(name)
+            endpoint["latency"].observe(seconds)
+            if status_code >= 500:
+                endpoint["errors"] += 1
+            for key, value in io.items():
+                endpoint["io"][key] += value
+
+    def record_io(self, key, amount=1):
+        with self._lock:
+            self.io_totals[key] += amount
+        # Attribute the I/O to the request being served, if any
+        if has_request_context():
+            request_io = g.get("metrics_io")
+            if request_io is not None:
+                request_io[key] += amount
+
+    def record_cache(self, name, hit):
+        with self._lock:
+            counters = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            counters["hits" if hit else "misses"] += 1
+
+    def snapshot(self, external_caches=None):
+        """Plain-data copy of all metrics, for the admin page and the exporter."""
+        with self._lock:
+            endpoints = []
+            for name, endpoint in sorted(self.endpoints.items()):
+                latency = endpoint["latency"]
+                endpoints.append({
+                    "endpoint": name,
+                    "requests": latency.count,
+                    "errors": endpoint["errors"],
+                    "mean": latency.total / latency.count if latency.count else None,
+                    "p50": latency.quantile(0.50),
+                    "p95": latency.quantile(0.95),
+                    "p99": latency.quantile(0.99),
+                    "total": latency.total,
+                    "buckets": list(zip(latency.buckets + [float("inf")], _cumulative(latency.counts))),
+                    "io": dict(endpoint["io"])
+                })
+            caches = {name: dict(counters) for name, counters in self.caches.items()}
+
+        caches.update(external_caches or {})
+        for counters in caches.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = counters["hits"] / lookups if lookups else None
+
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started_at,
+            "endpoints": endpoints,
+            "io": dict(self.io_totals),
+            "caches": dict(sorted(caches.items()))
+        }
+
+
+def _cumulative(counts):
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+metrics = Metrics()
+
+
+def record_csv_read(file_path):
+    """Hook for read_csv: count a full CSV parse and the bytes behind it."""
+    metrics.record_io("csv_reads")
+    try:
+        metrics.record_io("bytes_read", os.path.getsize(file_path))
+    except OSError:
+        pass
+
+
+def record_csv_write(byte_count):
+    """Hook for write_csv and append_csv: count a write and its size."""
+    metrics.record_io("csv_writes")
+    metrics.record_io("bytes_written", byte_count)
+
+
+def init_metrics(app):
+    """Time every request and attribute storage I/O to its endpoint."""
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_io = dict.fromkeys(IO_COUNTERS, 0)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("metrics_started")
+        if started is not None:
+            # Registered before the other after_request hooks, so it runs last
+            # and includes their time (e.g. compression)
+            metrics.record_request(
+                request.endpoint or "<unmatched>",
+                time.perf_counter() - started,
+                response.status_code,
+                g.get("metrics_io") or {}
+            )
+        return response
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(snapshot):
+    """Render a metrics snapshot in the Prometheus text exposition format."""
+    lines = [
+        "# HELP mcc_request_duration_seconds Request latency by endpoint.",
+        "# TYPE mcc_request_duration_seconds histogram",
+    ]
+    for endpoint in snapshot["endpoints"]:
+        name = _label(endpoint["endpoint"])
+        for bound, count in endpoint["buckets"]:
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'mcc_request_duration_seconds_bucket{{endpoint="{name}",le="{le}"}} {count}')
+        lines.append(f'mcc_request_duration_seconds_sum{{endpoint="{name}"}} {endpoint["total"]:.6f}')
+        lines.append(f'mcc_request_duration_seconds_count{{endpoint="{name}"}} {endpoint["requests"]}')
+
+    lines += [
+        "# HELP mcc_request_errors_total Responses with a 5xx status by endpoint.",
+        "# TYPE mcc_request_errors_total counter",
+    ]
+    for endpoint in snapshot["endpoints"]:
+        lines.append(f'mcc_request_errors_total{{endpoint="{_label(endpoint["endpoint"])}"}} {endpoint["errors"]}')
+
+    for key in IO_COUNTERS:
+        description = IO_DESCRIPTIONS[key]
+        lines += [
+            f"# HELP mcc_request_{key}_total {description} while serving requests, by endpoint.",
+            f"# TYPE mcc_request_{key}_total counter",
+        ]
+        for endpoint in snapshot["endpoints"]:
+            lines.append(f'mcc_request_{key}_total{{endpoint="{_label(endpoint["endpoint"])}"}} {endpoint["io"][key]}')
+        lines += [
+            f"# HELP mcc_{key}_total {description} by this worker, background work included.",
+            f"# TYPE mcc_{key}_total counter",
+            f"mcc_{key}_total {snapshot['io'][key]}",
+        ]
+
+    lines += [
+        "# HELP mcc_cache_lookups_total Cache lookups by cache and result.",
+        "# TYPE mcc_cache_lookups_total counter",
+    ]
+    for name, counters in snapshot["caches"].items():
+        lines.append(f'mcc_cache_lookups_total{{cache="{_label(name)}",result="hit"}} {counters["hits"]}')
+        lines.append(f'mcc_cache_lookups_total{{cache="{_label(name)}",result="miss"}} {counters["misses"]}')
+
+    lines += [
+        "# HELP mcc_process_uptime_seconds Seconds since this worker started.",
+        "# TYPE mcc_process_uptime_seconds gauge",
+        f'mcc_process_uptime_seconds{{pid="{snapshot["pid"]}"}} {snapshot["uptime"]:.0f}',
+    ]
+    return "\n".join(lines) + "\n"
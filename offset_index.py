@@ -0,0 +1,263 @@
+import csv
+import io
+import logging
+import marshal
+import mmap
+import os
+import sys
+import tempfile
+import threading
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Sidecar index of byte offsets into a CSV file, so single rows (or the rows
+# sharing a value, e.g. one tournament's matches) can be decoded straight
+# out of a memory map of the file without parsing the rest of it.
+INDEX_MAGIC = b"MCCIDX01"
+INDEX_TAG = f"{sys.implementation.name}-{sys.version_info[0]}.{sys.version_info[1]}"
+
+# Bytes before the end of the indexed region that are remembered, to tell
+# a genuine append from the file being edited in place
+TAIL_SIZE = 64
+
+# Indexes kept in memory, keyed by CSV path
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_path(file_path):
+    """Location of the offset index for a CSV file."""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(os.path.dirname(file_path), ".indexes", f"{name}.idx")
+
+
+def _scan_rows(data, start, end):
+    """
+    Yield (offset, length) of each complete CSV record in data[start:end].
+
+    Records end at a newline outside quotes; since quotes inside a field are
+    doubled, a newline ends the record whenever the quotes seen so far are
+    balanced. A trailing record without a newline is not yielded.
+    """
+    row_start = start
+    position = start
+    quotes = 0
+    while position < end:
+        newline = data.find(b"\n", position, end)
+        if newline == -1:
+            return
+        quotes += data[position:newline].count(b'"')
+        position = newline + 1
+        if quotes % 2 == 0:
+            yield row_start, position - row_start
+            row_start = position
+            quotes = 0
+
+
+def _parse_record(raw):
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    return next(csv.reader(io.StringIO(text, newline="")), [])
+
+
+def _make_row(header, values):
+    """Build a row dict the way read_csv does: stripped values, None when missing."""
+    row = {}
+    for i, field in enumerate(header):
+        row[field] = values[i].strip() if i < len(values) else None
+    if len(values) > len(header):
+        row[None] = [value.strip() for value in values[len(header):]]
+    return row
+
+
+def _new_index(stat, header, header_end, key_field, group_fields):
+    return {
+        "ino": stat.st_ino,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": header_end,
+        "tail": b"",
+        "header": header,
+        "key_field": key_field,
+        "offsets": {},
+        "groups": {field: {} for field in group_fields}
+    }
+
+
+def _extend_index(index, data, end):
+    """Add the records between the end of the indexed region and end."""
+    header = index["header"]
+    key_position = header.index(index["key_field"]) if index["key_field"] in header else None
+    group_positions = [(header.index(f), index["groups"][f]) for f in index["groups"] if f in header]
+
+    for offset, length in _scan_rows(data, index["size"], end):
+        values = _parse_record(data[offset:offset + length])
+        if not any(value.strip() for value in values):
+            continue  # blank line, skipped like csv.DictReader does
+        entry = (offset, length)
+        if key_position is not None and key_position < len(values):
+            # First occurrence wins, like a linear search would
+            index["offsets"].setdefault(values[key_position].strip(), entry)
+        for position, groups in group_positions:
+            if position < len(values):
+                groups.setdefault(values[position].strip(), []).append(entry)
+        index["size"] = offset + length
+
+    index["tail"] = bytes(data[max(0, index["size"] - TAIL_SIZE):index["size"]])
+
+
+def _read_header(data, size):
+    """Return (header fields, offset just past the header), or (None, 0)."""
+    for offset, length in _scan_rows(data, 0, size):
+        raw = bytes(data[offset:offset + length])
+        if raw.startswith(b"\xef\xbb\xbf"):
+            raw = raw[3:]
+        return [field.strip() for field in _parse_record(raw)], offset + length
+    return None, 0
+
+
+def _is_append(index, stat, data):
+    """Whether the file is the indexed one with only new records added at the end."""
+    if index["ino"] != stat.st_ino or stat.st_size < index["size"]:
+        return False
+    if stat.st_size == index["size"]:
+        return stat.st_mtime_ns == index["mtime_ns"]
+    start = index["size"] - len(index["tail"])
+    return bytes(data[start:index["size"]]) == index["tail"]
+
+
+def _load_saved_index(file_path):
+    try:
+        with open(index_path(file_path), "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    if not blob.startswith(INDEX_MAGIC):
+        return None
+    try:
+        tag, index = marshal.loads(blob[len(INDEX_MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return index if tag == INDEX_TAG else None
+
+
+def _save_index(file_path, index):
+    path = index_path(file_path)
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(marshal.dumps((INDEX_TAG, index)))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # The index is only an accelerator; it is rebuilt from the CSV when missing
+        logger.error(f"Error writing offset index for {file_path}: {e}")
+
+
+def _save_index_in_background(file_path, index):
+    snapshot = marshal.loads(marshal.dumps(index))
+    threading.Thread(target=_save_index, args=(file_path, snapshot), daemon=True).start()
+
+
+def _current_index(file_path, stat, data, key_field, group_fields):
+    """Return an index matching the mapped file, extending or rebuilding it as needed."""
+    with _indexes_lock:
+        index = _indexes.get(file_path)
+        if index is None:
+            index = _load_saved_index(file_path)
+        if index is not None and not _is_append(index, stat, data):
+            # Another worker may have appended and saved the carried-over index
+            saved = _load_saved_index(file_path)
+            if saved is not None and _is_append(saved, stat, data):
+                index = saved
+        if index is not None and (index["key_field"] != key_field
+                                  or set(index["groups"]) != set(group_fields)):
+            index = None
+
+        if index is not None and _is_append(index, stat, data):
+            if stat.st_size == index["size"]:
+                _indexes[file_path] = index
+                metrics.record_cache("offset_index", True)
+                return index
+        else:
+            header, header_end = _read_header(data, stat.st_size)
+            if header is None:
+                return None
+            index = _new_index(stat, header, header_end, key_field, group_fields)
+
+        # Only the newly appended records are parsed here
+        metrics.record_cache("offset_index", False)
+        indexed_size = index["size"]
+        _extend_index(index, data, stat.st_size)
+        index["ino"] = stat.st_ino
+        index["mtime_ns"] = stat.st_mtime_ns
+        _indexes[file_path] = index
+        if index["size"] != indexed_size or not index["offsets"]:
+            _save_index_in_background(file_path, index)
+        return index
+
+
+def carry_over_index(file_path, old_stat, new_stat):
+    """
+    Keep a file's index across append_csv, which replaces the file with a
+    copy that has rows added at the end: the indexed records sit at the same
+    offsets, so the next read only has to parse the new ones.
+    """
+    with _indexes_lock:
+        index = _indexes.get(file_path)
+        if index is None or index["ino"] != old_stat.st_ino or index["size"] > old_stat.st_size:
+            return
+        index["ino"] = new_stat.st_ino
+        _save_index_in_background(file_path, index)
+
+
+def read_indexed_rows(file_path, key_field, group_fields, key=None, group=None):
+    """
+    Return the rows of a CSV file with the given key, or in the given group.
+
+    Pass key to look up the row whose key_field equals it (a list with at
+    most one row), or group=(field, value) for every row with that value,
+    in file order. The file is memory-mapped and only the matching records
+    are decoded. Returns None if the file can't be read this way, so callers
+    can fall back to a full read.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                return []
+            # The mapping pins this version of the file even if it is
+            # replaced or appended to while it is being read
+            with mmap.mmap(f.fileno(), stat.st_size, access=mmap.ACCESS_READ) as data:
+                index = _current_index(file_path, stat, data, key_field, group_fields)
+                if index is None:
+                    return []
+
+                if group is not None:
+                    field, value = group
+                    entries = index["groups"][field].get(value, [])
+                else:
+                    entry = index["offsets"].get(key)
+                    entries = [entry] if entry else []
+
+                rows = [_make_row(index["header"], _parse_record(data[offset:offset + length]))
+                        for offset, length in entries]
+
+                # A last record without a trailing newline isn't indexed yet
+                if index["size"] < stat.st_size:
+                    values = _parse_record(data[index["size"]:stat.st_size])
+                    if any(value.strip() for value in values):
+                        row = _make_row(index["header"], values)
+                        if group is not None and row.get(group[0]) == group[1]:
+                            rows.append(row)
+                        elif group is None and not rows and row.get(key_field) == key:
+                            rows.append(row)
+                return rows
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading {file_path} through its offset index: {e}")
+        return None
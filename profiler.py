@@ -0,0 +1,248 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request, session
+
+logger = logging.getLogger(__name__)
+
+# Where profiles are kept (PROFILE_DIR) and how many of the slowest per
+# endpoint (PROFILE_TOP_N) are read when used, not at import, so settings
+# from .env apply however the module was imported
+def _profile_dir():
+    return os.environ.get("PROFILE_DIR", "profiles")
+
+
+def _settings_path():
+    return os.path.join(_profile_dir(), "settings.json")
+
+
+# Admins can profile any single request by sending this header
+PROFILE_HEADER = "X-Profile"
+
+DATA_FILES = ["data/participants.csv", "data/teams.csv", "data/tournaments.csv", "data/matches.csv"]
+
+PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+_settings_cache = {"mtime": None, "settings": None}
+_save_lock = threading.Lock()
+
+
+def default_settings():
+    return {"enabled": False, "sample_rate": 0.01}
+
+
+def load_settings():
+    """Profiler switch shared by all workers, re-read only when the file changes."""
+    settings_path = _settings_path()
+    try:
+        mtime = os.stat(settings_path).st_mtime_ns
+    except OSError:
+        return default_settings()
+    if _settings_cache["mtime"] != mtime:
+        try:
+            with open(settings_path, "r", encoding="utf-8") as f:
+                settings = dict(default_settings(), **json.load(f))
+        except (OSError, ValueError):
+            settings = default_settings()
+        _settings_cache.update(mtime=mtime, settings=settings)
+    return _settings_cache["settings"]
+
+
+def save_settings(enabled, sample_rate):
+    os.makedirs(_profile_dir(), exist_ok=True)
+    settings_path = _settings_path()
+    tmp_path = f"{settings_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"enabled": enabled, "sample_rate": sample_rate}, f)
+    os.replace(tmp_path, settings_path)
+
+
+def _should_profile():
+    # The header is only honoured for admins, so visitors can't slow pages down
+    if request.headers.get(PROFILE_HEADER) == "1" and session.get("admin_logged_in"):
+        return True
+    settings = load_settings()
+    return settings["enabled"] and random.random() < settings["sample_rate"]
+
+
+def _data_sizes():
+    sizes = {}
+    for file_path in DATA_FILES:
+        try:
+            sizes[os.path.basename(file_path)] = os.path.getsize(file_path)
+        except OSError:
+            sizes[os.path.basename(file_path)] = None
+    return sizes
+
+
+def _safe_name(endpoint):
+    return re.sub(r"[^A-Za-z0-9_]", "_", endpoint or "unmatched")
+
+
+def _save_profile(profile, info):
+    """Store a profile if it is among the slowest PROFILE_TOP_N of its endpoint."""
+    endpoint = _safe_name(info["endpoint"])
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    profile_id = f"{endpoint}.{info['duration_ms']:010.1f}ms.{stamp}.{os.getpid()}"
+    profile_dir = _profile_dir()
+    top_n = int(os.environ.get("PROFILE_TOP_N", "10"))
+
+    with _save_lock:
+        os.makedirs(profile_dir, exist_ok=True)
+        existing = list_profiles(endpoint)
+        if len(existing) >= top_n and info["duration_ms"] <= existing[-1]["duration_ms"]:
+            return None
+
+        profile.dump_stats(os.path.join(profile_dir, f"{profile_id}.prof"))
+        with open(os.path.join(profile_dir, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(dict(info, id=profile_id), f, indent=2)
+
+        # Drop the fastest ones beyond the top N
+        for old in list_profiles(endpoint)[top_n:]:
+            for suffix in (".prof", ".json"):
+                try:
+                    os.remove(os.path.join(profile_dir, f"{old['id']}{suffix}"))
+                except OSError:
+                    pass
+    return profile_id
+
+
+def list_profiles(endpoint=None):
+    """Stored profile summaries, slowest first, optionally for one endpoint."""
+    profile_dir = _profile_dir()
+    try:
+        names = os.listdir(profile_dir)
+    except OSError:
+        return []
+    prefix = f"{_safe_name(endpoint)}." if endpoint else ""
+    profiles = []
+    for name in names:
+        if not name.endswith(".json") or name == "settings.json" or not name.startswith(prefix):
+            continue
+        try:
+            with open(os.path.join(profile_dir, name), "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda p: p["duration_ms"], reverse=True)
+    return profiles
+
+
+def profile_path(profile_id):
+    """Path of a stored pstats file, or None for an unknown or malformed id."""
+    if not PROFILE_ID_PATTERN.match(profile_id or ""):
+        return None
+    path = os.path.join(_profile_dir(), f"{profile_id}.prof")
+    return path if os.path.isfile(path) else None
+
+
+def _frame_name(func):
+    file_name, line, name = func
+    if file_name == "~":
+        return name  # built-in, e.g. <built-in method posix.stat>
+    return f"{name} ({os.path.basename(file_name)}:{line})"
+
+
+def collapsed_stacks(path, min_fraction=0.0005):
+    """
+    Convert a pstats file to collapsed stacks ("a;b;c <microseconds>" lines).
+
+    cProfile only records caller/callee pairs, not whole stacks, so each
+    function's time is split between its callers in proportion to the time
+    spent under each of them. Branches carrying less than min_fraction of the
+    profile's total time are dropped, otherwise the number of paths through
+    a large call graph explodes. The output opens in flamegraph.pl,
+    speedscope and similar tools.
+    """
+    stats = pstats.Stats(path).stats
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+    roots = [func for func, entry in stats.items() if not entry[4]]
+    min_seconds = sum(stats[root][3] for root in roots) * min_fraction
+
+    totals = {}
+
+    def walk(func, stack, share):
+        # share is the fraction of func's total time spent under this stack
+        self_time = stats[func][2]
+        stack = stack + [_frame_name(func)]
+        if self_time * share > 0:
+            key = ";".join(stack)
+            totals[key] = totals.get(key, 0) + self_time * share
+        for callee in callees.get(func, []):
+            if callee == func or _frame_name(callee) in stack:
+                continue  # recursion is folded into the outer frame
+            edge_cumulative = stats[callee][4][func][3]
+            callee_cumulative = stats[callee][3]
+            if callee_cumulative > 0 and share * edge_cumulative >= min_seconds:
+                walk(callee, stack, share * edge_cumulative / callee_cumulative)
+
+    for root in roots:
+        walk(root, [], 1.0)
+
+    lines = [f"{stack} {int(seconds * 1_000_000)}" for stack, seconds in sorted(totals.items())
+             if int(seconds * 1_000_000) > 0]
+    return "\n".join(lines) + "\n"
+
+
+def profile_summary(path, limit=30):
+    """Text table of the functions with the highest cumulative time."""
+    output = io.StringIO()
+    pstats.Stats(path, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+
+def init_profiler(app):
+    """Profile sampled requests, or admin requests sent with X-Profile: 1."""
+
+    @app.before_request
+    def start_profile():
+        if not _should_profile():
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # another profiler is already active in this thread
+        g.profile = profile
+        g.profile_started = time.perf_counter()
+        g.profile_cpu_started = time.thread_time()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        profile.disable()
+        duration = time.perf_counter() - g.profile_started
+        info = {
+            "endpoint": request.endpoint or "<unmatched>",
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "cpu_ms": round((time.thread_time() - g.profile_cpu_started) * 1000, 1),
+            "io": dict(g.get("metrics_io") or {}),
+            "data_sizes": _data_sizes(),
+            "captured_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "pid": os.getpid()
+        }
+        try:
+            profile_id = _save_profile(profile, info)
+        except OSError as e:
+            logger.error(f"Error saving profile: {e}")
+            profile_id = None
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+        return response
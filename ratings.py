@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+
+# Team strength as Elo ratings. They are built once by replaying every
+# completed match, then kept up to date one journal event at a time; the
+# sequence number of the last event applied is stored with the ratings, so
+# a restart only replays what was recorded since. Elo depends on the order
+# results are applied in, so a full replay follows the order they were
+# posted in, the same order the incremental updates use.
+RATINGS_PATH = "data/.ratings.json"
+
+
+def rating_params():
+    """
+    The starting rating (RATING_INITIAL) and K factor (RATING_K).
+
+    Read from the environment when needed rather than at import, so the
+    values in .env apply however the module was imported.
+    """
+    return {
+        "initial": float(os.environ.get("RATING_INITIAL", "1500")),
+        "k": float(os.environ.get("RATING_K", "32")),
+    }
+
+
+def initial_rating():
+    """Rating of a team that hasn't played yet."""
+    return rating_params()["initial"]
+
+
+def expected_score(rating, opponent_rating):
+    """Probability-like expected score of a team against an opponent."""
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def match_result(match):
+    """(team1_id, team2_id, team1's score 1/0.5/0), or None if the match doesn't count."""
+    team1_id, team2_id = match.get("team1_id"), match.get("team2_id")
+    # Byes are recorded as completed matches against nobody
+    if match.get("status") != "completed" or not team1_id or not team2_id:
+        return None
+    winner_id = match.get("winner_id") or ""
+    if winner_id == team1_id:
+        return team1_id, team2_id, 1.0
+    if winner_id == team2_id:
+        return team1_id, team2_id, 0.0
+    return team1_id, team2_id, 0.5
+
+
+def replay_order(matches, tournaments):
+    """Completed matches in the order they were played: by tournament, round, match."""
+    def number(value):
+        return int(value) if str(value).isdigit() else 0
+
+    started = {t["id"]: (t.get("created_at", ""), number(t["id"])) for t in tournaments}
+    return sorted(
+        (match for match in matches if match_result(match)),
+        key=lambda m: (started.get(m["tournament_id"], ("", 0)),
+                       number(m["round"]), number(m["match_number"]))
+    )
+
+
+def posting_order(matches, tournaments, posted):
+    """
+    Completed matches in the order their results were posted.
+
+    posted maps a match id to the journal sequence number of its first
+    result. Matches without one (completed before the journal was kept)
+    come first, in replay order.
+    """
+    ordered = replay_order(matches, tournaments)
+    return ([m for m in ordered if m["id"] not in posted]
+            + sorted((m for m in ordered if m["id"] in posted), key=lambda m: posted[m["id"]]))
+
+
+class RatingEngine:
+    """
+    Elo ratings per team, persisted with the journal sequence they are current to.
+
+    The stamp identifies the journal event at that sequence number, so
+    ratings saved against a different journal (e.g. before a backup was
+    restored) can be told apart from current ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.ratings = None
+        self.high_water = 0
+        self.stamp = None
+        self.params = None
+
+    def _team(self, team_id):
+        team = self.ratings.get(team_id)
+        if team is None:
+            team = {"rating": self.params["initial"], "played": 0, "wins": 0, "losses": 0, "draws": 0}
+            self.ratings[team_id] = team
+        return team
+
+    def apply(self, match):
+        """Update both teams' ratings with one result; return whether it counted."""
+        result = match_result(match)
+        if result is None:
+            return False
+        team1_id, team2_id, score = result
+        team1, team2 = self._team(team1_id), self._team(team2_id)
+        expected = expected_score(team1["rating"], team2["rating"])
+        change = self.params["k"] * (score - expected)
+        team1["rating"] += change
+        team2["rating"] -= change
+
+        for team, team_score in ((team1, score), (team2, 1 - score)):
+            team["played"] += 1
+            if team_score == 1:
+                team["wins"] += 1
+            elif team_score == 0:
+                team["losses"] += 1
+            else:
+                team["draws"] += 1
+        return True
+
+    def rebuild(self, ordered_matches, high_water, stamp):
+        """Start over from the given completed matches, current to journal event high_water."""
+        self.params = rating_params()
+        self.ratings = {}
+        for match in ordered_matches:
+            self.apply(match)
+        self.high_water = high_water
+        self.stamp = stamp
+
+    def load(self):
+        """Read persisted ratings; return False if missing or computed with other settings."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        params = rating_params()
+        if state.get("params") != params:
+            return False
+        self.params = params
+        self.ratings = state["ratings"]
+        self.high_water = state["high_water"]
+        self.stamp = state.get("stamp")
+        return True
+
+    def save(self):
+        """Write the ratings out, unless another worker already saved newer ones."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                if json.load(f).get("high_water", 0) > self.high_water:
+                    return
+        except (OSError, ValueError):
+            pass
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"params": self.params, "high_water": self.high_water,
+                       "stamp": self.stamp, "ratings": self.ratings}, f)
+        os.replace(tmp_path, self.path)
+
+
+rating_engine = RatingEngine(RATINGS_PATH)
@@ -0,0 +1,174 @@
+import csv
+import logging
+import os
+import sys
+import threading
+
+from utils import data_write_lock
+from backups import create_backup
+from id_allocator import migrate_ids
+from data_versions import table_versions
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "data"
+
+# The schema version the data directory has been migrated to
+VERSION_FILE = "data/.schema_version"
+
+TABLE_PATHS = {
+    "participants": "data/participants.csv",
+    "teams": "data/teams.csv",
+    "tournaments": "data/tournaments.csv",
+    "matches": "data/matches.csv",
+}
+
+# Columns of each table, in file order; new tables are created with these
+TABLE_HEADERS = {
+    "participants": ["id", "first_name", "last_name", "team_id", "needs_teammate", "created_at"],
+    "teams": ["id", "name", "created_at"],
+    "tournaments": ["id", "name", "type", "status", "created_at"],
+    "matches": [
+        "id", "tournament_id", "round", "match_number",
+        "team1_id", "team2_id", "team1_score", "team2_score",
+        "winner_id", "status", "next_match_id", "next_match_position"
+    ],
+}
+
+_migrated = threading.Event()
+
+
+def _rewrite_table(table, transform):
+    """Rewrite a table's file through transform(header, rows) -> (header, rows)."""
+    path = TABLE_PATHS[table]
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        rows = list(reader)
+    if header is None:
+        return
+    header, rows = transform(header, rows)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+    table_versions.bump(path)
+
+
+def _add_column(table, column, default):
+    """Migration step: append a column to a table that doesn't have it yet."""
+    def transform(header, rows):
+        if column in header:
+            return header, rows
+        return header + [column], [row + [default] for row in rows]
+    _rewrite_table(table, transform)
+
+
+def _add_needs_teammate():
+    _add_column("participants", "needs_teammate", "False")
+
+
+def _seed_id_counters():
+    # next_id no longer scans the table on every call, so counters behind the
+    # highest id (e.g. after an import by an older version) are raised once
+    for problem in migrate_ids():
+        logger.warning(problem)
+
+
+# Migrations in the order they apply. Each takes the data directory from the
+# previous version to its own and must be safe to re-run, because data from
+# before the version file existed starts at version 0 whatever its shape.
+MIGRATIONS = [
+    (1, "Add needs_teammate to participants", _add_needs_teammate),
+    (2, "Seed id counters from existing ids", _seed_id_counters),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def read_version():
+    """Version recorded in the data directory, 0 if it has never been migrated."""
+    try:
+        with open(VERSION_FILE, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_version(version):
+    tmp_path = f"{VERSION_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(version))
+    os.replace(tmp_path, VERSION_FILE)
+
+
+def schema_is_current():
+    """Cheap startup check: one small file read and a stat() per table."""
+    return (read_version() == SCHEMA_VERSION
+            and all(os.path.exists(path) for path in TABLE_PATHS.values()))
+
+
+def migrate():
+    """
+    Create missing tables and apply pending migrations; return their descriptions.
+
+    Runs under the data write lock, so when several workers start on an old
+    data directory only the first migrates it and the rest find it current.
+    Existing data is backed up before any migration is applied.
+    """
+    applied = []
+    with data_write_lock():
+        os.makedirs(DATA_DIR, exist_ok=True)
+        created = []
+        for table, path in TABLE_PATHS.items():
+            if not os.path.exists(path):
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(TABLE_HEADERS[table])
+                created.append(table)
+
+        version = read_version()
+        pending = [(v, description, step) for v, description, step in MIGRATIONS if v > version]
+        if pending and len(created) < len(TABLE_PATHS):
+            create_backup(label="pre-migration")
+        for version, description, step in pending:
+            step()
+            _write_version(version)
+            applied.append(description)
+    _migrated.set()
+    return applied
+
+
+def init_schema(app):
+    """Check the schema version at startup; migrate before the first request if behind."""
+    if schema_is_current():
+        _migrated.set()
+        return
+
+    @app.before_request
+    def ensure_schema():
+        if not _migrated.is_set():
+            for description in migrate():
+                app.logger.info(f"Applied schema migration: {description}")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from backups import load_settings as load_backup_settings
+
+    # The pre-migration backup goes where the app's backups do
+    load_dotenv()
+    load_backup_settings()
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "status":
+        print(f"Data is at schema version {read_version()}, current is {SCHEMA_VERSION}.")
+    elif command == "migrate":
+        descriptions = migrate()
+        for description in descriptions:
+            print(f"Applied: {description}")
+        print(f"Data is at schema version {read_version()}.")
+    else:
+        print("Usage: python schema.py [status|migrate]")
+        sys.exit(2)
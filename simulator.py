@@ -0,0 +1,329 @@
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # no odds are shown without numpy
+    np = None
+
+from ratings import expected_score, initial_rating
+from utils import get_team_ratings, get_tournament_by_id, get_tournament_matches
+
+try:
+    import fcntl
+except ImportError:  # Windows: several workers may simulate the same bracket
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SIMULATOR_AVAILABLE = np is not None
+
+# Win probabilities of each team in a live elimination bracket, from many
+# random completions of its pending matches. Results are stored per
+# tournament together with the bracket version they were computed for, and
+# recomputed by a background thread after each score post.
+SIMULATION_DIR = "data/.simulations"
+
+# Completions sampled per task handed to a worker process
+SIMULATION_CHUNK = 25000
+
+_pool = None
+_pool_pid = None
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+_result_cache = {}
+
+
+def _number(value):
+    return int(value) if str(value).isdigit() else 0
+
+
+def bracket_version(matches):
+    """Digest of everything in a bracket that changes its odds."""
+    state = sorted(
+        (m["id"], m["team1_id"], m["team2_id"], m["winner_id"], m["status"],
+         m["next_match_id"], m["next_match_position"])
+        for m in matches
+    )
+    return hashlib.sha1(json.dumps(state).encode("utf-8")).hexdigest()
+
+
+def compile_bracket(matches, ratings):
+    """
+    Describe an elimination bracket as plain lists for simulate().
+
+    Each match becomes (round index, slot 1, slot 2, winner). A slot is a
+    team index, len(teams) for nobody (a bye), or -2 - i for the winner of
+    match i. The winner is a team index for completed matches and None for
+    pending ones. Returns None for brackets that don't end in a single
+    final, such as round robins.
+    """
+    ordered = sorted(matches, key=lambda m: (_number(m["round"]), _number(m["match_number"])))
+    if sum(1 for m in ordered if not m["next_match_id"]) != 1:
+        return None
+
+    position = {m["id"]: i for i, m in enumerate(ordered)}
+    feeders = {(m["next_match_id"], m["next_match_position"]): i
+               for i, m in enumerate(ordered) if m["next_match_id"] in position}
+    team_ids = sorted({m[key] for m in ordered for key in ("team1_id", "team2_id", "winner_id") if m[key]})
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+    nobody = len(team_ids)
+    round_index = {r: i for i, r in enumerate(sorted({_number(m["round"]) for m in ordered}))}
+    unrated = initial_rating()
+
+    compiled = []
+    for m in ordered:
+        slots = []
+        for key, slot_position in (("team1_id", "1"), ("team2_id", "2")):
+            if m[key]:
+                slots.append(team_index[m[key]])
+            elif (m["id"], slot_position) in feeders:
+                slots.append(-2 - feeders[(m["id"], slot_position)])
+            else:
+                slots.append(nobody)
+        winner = team_index.get(m["winner_id"], nobody) if m["status"] == "completed" else None
+        compiled.append((round_index[_number(m["round"])], slots[0], slots[1], winner))
+
+    return {
+        "teams": team_ids,
+        "ratings": [ratings.get(team_id, unrated) for team_id in team_ids],
+        "rounds": len(round_index),
+        "matches": compiled,
+        "final": next(i for i, m in enumerate(ordered) if not m["next_match_id"]),
+    }
+
+
+def _tally(counts, column, side, runs):
+    if np.ndim(side) == 0:
+        counts[side, column] += runs
+    else:
+        counts[:, column] += np.bincount(side, minlength=len(counts))
+
+
+def simulate(bracket, runs, seed):
+    """
+    Play out a compiled bracket runs times and count where each team got to.
+
+    Every match is decided for all runs at once: each slot is an array with
+    one team index per run, and a pending match draws one uniform number per
+    run against the Elo win probability. Returns a (teams, rounds + 1) array
+    of how many runs each team played in each round, the last column
+    counting titles.
+    """
+    rng = np.random.default_rng(seed)
+    nobody = len(bracket["teams"])
+    # Nobody gets a rating too, so lookups need no masking; byes are
+    # resolved explicitly below
+    ratings = np.append(np.asarray(bracket["ratings"], dtype=np.float64), initial_rating())
+    counts = np.zeros((nobody + 1, bracket["rounds"] + 1), dtype=np.int64)
+    winners = []
+
+    for round_number, slot1, slot2, winner in bracket["matches"]:
+        team1 = winners[-2 - slot1] if slot1 < -1 else slot1
+        team2 = winners[-2 - slot2] if slot2 < -1 else slot2
+        _tally(counts, round_number, team1, runs)
+        _tally(counts, round_number, team2, runs)
+
+        if winner is None:
+            team1_wins = rng.random(runs) < expected_score(ratings[team1], ratings[team2])
+            winner = np.where(team1_wins, team1, team2)
+            winner = np.where(team1 == nobody, team2, np.where(team2 == nobody, team1, winner))
+        winners.append(winner)
+
+    _tally(counts, bracket["rounds"], winners[bracket["final"]], runs)
+    return counts[:nobody]
+
+
+def simulation_settings():
+    """
+    (runs per simulation, worker processes) from SIMULATION_RUNS and SIMULATION_WORKERS.
+
+    Read when a simulation runs rather than at import, so the values in
+    .env apply however the module was imported.
+    """
+    runs = int(os.environ.get("SIMULATION_RUNS", "100000"))
+    workers = int(os.environ.get("SIMULATION_WORKERS", str(min(os.cpu_count() or 1, 4))))
+    return runs, workers
+
+
+def _process_pool(workers):
+    """Worker processes for simulations, started once per app process."""
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        # Spawned rather than forked: the app process has threads running
+        # (logging, backups) whose locks a forked child could inherit held
+        _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_pid = os.getpid()
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def run_simulation(bracket, runs=None, workers=None):
+    """Probability of each team reaching each round (and winning), from runs completions."""
+    default_runs, default_workers = simulation_settings()
+    runs = default_runs if runs is None else runs
+    workers = default_workers if workers is None else workers
+    chunks = [SIMULATION_CHUNK] * (runs // SIMULATION_CHUNK)
+    if runs % SIMULATION_CHUNK:
+        chunks.append(runs % SIMULATION_CHUNK)
+    seeds = np.random.SeedSequence().spawn(len(chunks))
+
+    if workers > 1 and len(chunks) > 1:
+        parts = _process_pool(workers).map(simulate, [bracket] * len(chunks), chunks, seeds)
+    else:
+        parts = map(simulate, [bracket] * len(chunks), chunks, seeds)
+    counts = sum(parts)
+    return {team_id: (counts[i] / runs).tolist() for i, team_id in enumerate(bracket["teams"])}
+
+
+def _result_path(tournament_id):
+    return os.path.join(SIMULATION_DIR, f"{tournament_id}.json")
+
+
+def load_result(tournament_id):
+    """The last stored simulation of a tournament, or None."""
+    path = _result_path(tournament_id)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _result_cache.get(tournament_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _result_cache[tournament_id] = (mtime, result)
+    return result
+
+
+def simulate_tournament(tournament_id):
+    """
+    Simulate a tournament's current bracket and store the result.
+
+    Skipped if the stored result is already for this bracket version, or if
+    another worker process is simulating the same tournament.
+    """
+    tournament = get_tournament_by_id(tournament_id)
+    if not tournament or tournament["status"] == "completed":
+        return None
+    matches = get_tournament_matches(tournament_id)
+    version = bracket_version(matches)
+    stored = load_result(tournament_id)
+    if stored and stored["version"] == version:
+        return stored
+
+    os.makedirs(SIMULATION_DIR, exist_ok=True)
+    with open(os.path.join(SIMULATION_DIR, f".{tournament_id}.lock"), "a") as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return None
+
+        ratings = {team_id: team["rating"] for team_id, team in get_team_ratings().items()}
+        bracket = compile_bracket(matches, ratings)
+        if bracket is None:
+            return None
+        runs, workers = simulation_settings()
+        started = time.perf_counter()
+        result = {
+            "version": version,
+            "runs": runs,
+            "rounds": bracket["rounds"],
+            "computed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "teams": run_simulation(bracket, runs, workers),
+        }
+        tmp_path = f"{_result_path(tournament_id)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, _result_path(tournament_id))
+    logger.info(f"Simulated tournament {tournament_id} {runs} times",
+                extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)})
+    return result
+
+
+class SimulationScheduler(threading.Thread):
+    """Daemon thread simulating tournaments as their brackets change."""
+
+    def __init__(self):
+        super().__init__(name="simulation-scheduler", daemon=True)
+        self._pending = []
+        self._condition = threading.Condition()
+
+    def request(self, tournament_id):
+        with self._condition:
+            if tournament_id not in self._pending:
+                self._pending.append(tournament_id)
+                self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                tournament_id = self._pending.pop(0)
+            try:
+                simulate_tournament(tournament_id)
+            except Exception as e:
+                logger.error(f"Simulating tournament {tournament_id} failed: {e}")
+
+
+def request_simulation(tournament_id):
+    """Queue a tournament to be re-simulated in the background."""
+    global _scheduler, _scheduler_pid
+    if not SIMULATOR_AVAILABLE:
+        return
+    with _scheduler_lock:
+        # Threads don't survive fork; each worker process starts its own
+        if _scheduler_pid != os.getpid():
+            _scheduler = SimulationScheduler()
+            _scheduler.start()
+            _scheduler_pid = os.getpid()
+    _scheduler.request(tournament_id)
+
+
+def get_odds(tournament, matches):
+    """
+    Stored odds for a live bracket, for display, or None.
+
+    Never simulates on the calling thread: if the stored result is missing
+    or for an older version of the bracket, a background run is queued and
+    the older result (marked stale) is returned meanwhile.
+    """
+    if not SIMULATOR_AVAILABLE or tournament["status"] == "completed" or tournament["type"] == "round_robin":
+        return None
+    result = load_result(tournament["id"])
+    stale = result is None or result["version"] != bracket_version(matches)
+    if stale:
+        request_simulation(tournament["id"])
+    if result is None:
+        return None
+    return dict(result, stale=stale)
+
+
+def odds_table(odds, team_dict):
+    """Teams still able to win, most likely champion first, with per-round percentages."""
+    rows = []
+    for team_id, probabilities in odds["teams"].items():
+        if probabilities[-1] == 0:
+            continue
+        rows.append({
+            "team_id": team_id,
+            "name": team_dict.get(team_id, f"Team {team_id}"),
+            # Everyone plays in the first round, so it is left out
+            "rounds": [round(p * 100, 1) for p in probabilities[1:]],
+        })
+    rows.sort(key=lambda row: row["rounds"][::-1], reverse=True)
+    return rows
@@ -0,0 +1,107 @@
+import array
+import logging
+import marshal
+import os
+import sys
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# marshal's format is tied to the interpreter version, so snapshots written
+# by another Python are simply ignored and rebuilt from the CSV
+SNAPSHOT_MAGIC = b"MCCSNAP1"
+SNAPSHOT_TAG = f"{sys.implementation.name}-{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def snapshot_path(file_path):
+    """Location of the binary snapshot for a CSV file."""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(os.path.dirname(file_path), ".snapshots", f"{name}.bin")
+
+
+def _encode_column(values):
+    """Dictionary-encode a column as (distinct values, packed codes) unless every value is distinct."""
+    codes_by_value = {}
+    codes = [codes_by_value.setdefault(value, len(codes_by_value)) for value in values]
+    if len(codes_by_value) == len(values):
+        return (tuple(values), None)
+    distinct = tuple(codes_by_value)
+    typecode = "B" if len(distinct) <= 0xFF else "H" if len(distinct) <= 0xFFFF else "I"
+    return (distinct, typecode, array.array(typecode, codes).tobytes())
+
+
+def _decode_column(encoded):
+    if encoded[1] is None:
+        return encoded[0]
+    distinct, typecode, packed = encoded
+    codes = array.array(typecode)
+    codes.frombytes(packed)
+    return [distinct[code] for code in codes]
+
+
+def save_snapshot(file_path, stamp, rows):
+    """
+    Write a columnar binary snapshot of a table's rows.
+
+    Each column is stored once, dictionary-encoded when it repeats values
+    (status, round, team ids...), and the snapshot records the change stamp
+    of the CSV it mirrors so it is only ever used for exactly that version.
+    """
+    if None in stamp:
+        return
+
+    fields = []
+    seen = set()
+    for row in rows:
+        for field in row:
+            # csv puts the values of a row longer than the header under None;
+            # they belong to no column and are left out
+            if field is not None and field not in seen:
+                seen.add(field)
+                fields.append(field)
+
+    try:
+        columns = tuple(_encode_column([row.get(field, "") for row in rows]) for field in fields)
+        payload = marshal.dumps((SNAPSHOT_TAG, stamp, tuple(fields), len(rows), columns))
+    except (TypeError, ValueError) as e:
+        # Runs in a background thread, so this is the only trace of a failure
+        logger.error(f"Error encoding snapshot for {file_path}: {e}")
+        return
+
+    path = snapshot_path(file_path)
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # The snapshot is only an accelerator; the CSV stays authoritative
+        logger.error(f"Error writing snapshot for {file_path}: {e}")
+
+
+def load_snapshot(file_path, stamp):
+    """Return the rows stored for this exact CSV version, or None if there is no usable snapshot."""
+    try:
+        with open(snapshot_path(file_path), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if not data.startswith(SNAPSHOT_MAGIC):
+        return None
+
+    try:
+        tag, snapshot_stamp, fields, row_count, columns = marshal.loads(data[len(SNAPSHOT_MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    if tag != SNAPSHOT_TAG or snapshot_stamp != stamp:
+        return None
+
+    if not fields:
+        return [{} for _ in range(row_count)]
+    decoded = [_decode_column(column) for column in columns]
+    return [dict(zip(fields, values)) for values in zip(*decoded)]
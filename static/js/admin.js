@@ -92,23 +92,21 @@ function initReassignParticipant() {
         const button = event.relatedTarget;
         const participantId = button.getAttribute('data-participant-id');
         const participantName = button.getAttribute('data-participant-name');
-        const currentTeamId = button.getAttribute('data-team-id');
         
         const modalTitle = reassignModal.querySelector('.modal-title');
         const participantIdInput = reassignModal.querySelector('#reassign_participant_id');
-        const teamSelect = reassignModal.querySelector('#new_team_id');
+        const teamSearch = reassignModal.querySelector('#new_team_search');
+        const teamIdInput = reassignModal.querySelector('#new_team_id');
+        const resultsList = reassignModal.querySelector('.autocomplete-results');
         
         modalTitle.textContent = `Reassign ${participantName}`;
         participantIdInput.value = participantId;
         
-        // Select current team in dropdown
-        if (teamSelect) {
-            for (let i = 0; i < teamSelect.options.length; i++) {
-                if (teamSelect.options[i].value === currentTeamId) {
-                    teamSelect.selectedIndex = i;
-                    break;
-                }
-            }
+        // Start from an empty team search for each participant
+        if (teamSearch) {
+            teamSearch.value = '';
+            teamIdInput.value = '';
+            resultsList.innerHTML = '';
         }
     });
 }
@@ -0,0 +1,39 @@
+/**
+ * Charts for the admin analytics page
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const dataScript = document.getElementById('analytics-charts');
+    if (!dataScript || typeof Chart === 'undefined') return;
+
+    const charts = JSON.parse(dataScript.textContent);
+    Chart.defaults.color = '#adb5bd';
+
+    drawLineChart('tournament-chart', charts.tournaments.labels, [
+        { label: 'Average points per match', data: charts.tournaments.avg_points, borderColor: '#0d6efd' },
+        { label: 'Average winning margin', data: charts.tournaments.avg_margin, borderColor: '#ffc107' }
+    ]);
+    drawLineChart('round-chart', charts.rounds.labels, [
+        { label: 'Average winning margin', data: charts.rounds.avg_margin, borderColor: '#ffc107' }
+    ]);
+});
+
+/**
+ * Draw a line chart; null points (no scored matches) are left as gaps
+ */
+function drawLineChart(canvasId, labels, datasets) {
+    const canvas = document.getElementById(canvasId);
+    if (!canvas || !labels.length) return;
+
+    new Chart(canvas, {
+        type: 'line',
+        data: {
+            labels: labels,
+            datasets: datasets.map(dataset => Object.assign({ tension: 0.2, spanGaps: false }, dataset))
+        },
+        options: {
+            responsive: true,
+            scales: { y: { beginAtZero: true } }
+        }
+    });
+}
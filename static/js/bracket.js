@@ -11,104 +11,91 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 /**
- * Initialize bracket visualization with connections between matches
+ * Initialize bracket visualization from the server-computed layout
  */
 function initBracketVisualization() {
     const bracketContainer = document.querySelector('.tournament-bracket');
-    if (!bracketContainer) return;
+    const layoutScript = document.getElementById('bracket-layout');
+    if (!bracketContainer || !layoutScript) return;
     
-    // Draw connecting lines between matches using SVG
-    setTimeout(function() {
-        drawBracketConnections();
-        
-        // Redraw connections on window resize
-        window.addEventListener('resize', function() {
-            // Remove existing SVG lines
-            const existingSvgs = document.querySelectorAll('.bracket-connector');
-            existingSvgs.forEach(svg => svg.remove());
-            
-            // Redraw connections
-            drawBracketConnections();
-        });
-    }, 100);
+    const layout = JSON.parse(layoutScript.textContent);
+    if (!layout.columns.length) return;
+    
+    // Coordinates are relative to the bracket container, so nothing needs
+    // to be re-measured or redrawn when the window is resized
+    positionBracketCards(bracketContainer, layout);
+    drawBracketConnections(bracketContainer, layout);
 }
 
 /**
- * Draw SVG connections between tournament matches
+ * Place round columns and match cards at their layout coordinates
  */
-function drawBracketConnections() {
-    const rounds = document.querySelectorAll('.tournament-round');
-    if (rounds.length <= 1) return;
+function positionBracketCards(bracketContainer, layout) {
+    const inner = document.createElement('div');
+    inner.className = 'bracket-layout';
+    inner.style.position = 'relative';
+    inner.style.width = layout.width + 'px';
+    inner.style.height = layout.height + 'px';
     
-    for (let i = 1; i < rounds.length; i++) {
-        const currentRound = rounds[i];
-        const previousRound = rounds[i-1];
-        
-        const currentMatches = currentRound.querySelectorAll('.match-card');
-        const previousMatches = previousRound.querySelectorAll('.match-card');
+    const columnX = {};
+    layout.columns.forEach(function(column) {
+        columnX[column.round] = column.x;
+    });
+    
+    bracketContainer.querySelectorAll('.tournament-round').forEach(function(round) {
+        round.style.position = 'absolute';
+        round.style.top = '0';
+        round.style.left = (columnX[round.dataset.round] || 0) + 'px';
+        round.style.width = layout.card_width + 'px';
+        round.style.height = layout.height + 'px';
+        round.style.margin = '0';
         
-        currentMatches.forEach(function(currentMatch) {
-            // Get the two previous matches that feed into this one
-            const matchId = currentMatch.dataset.matchId;
-            const feederMatches = Array.from(previousMatches).filter(match => 
-                match.dataset.nextMatchId === matchId
-            );
-            
-            feederMatches.forEach(function(feederMatch) {
-                connectMatchCards(feederMatch, currentMatch, feederMatch.dataset.nextMatchPosition);
-            });
+        round.querySelectorAll('.match-card').forEach(function(card) {
+            const position = layout.matches[card.dataset.matchId];
+            if (!position) return;
+            card.style.position = 'absolute';
+            card.style.top = position.y + 'px';
+            card.style.left = '0';
+            card.style.width = layout.card_width + 'px';
+            card.style.height = layout.card_height + 'px';
+            card.style.margin = '0';
+            card.style.overflow = 'hidden';
         });
-    }
+        
+        inner.appendChild(round);
+    });
+    
+    bracketContainer.appendChild(inner);
 }
 
 /**
- * Connect two match cards with an SVG line
+ * Draw all connections between matches as a single SVG layer
  */
-function connectMatchCards(fromCard, toCard, position) {
-    const fromRect = fromCard.getBoundingClientRect();
-    const toRect = toCard.getBoundingClientRect();
+function drawBracketConnections(bracketContainer, layout) {
+    if (!layout.connectors.length) return;
     
-    // Create SVG element
-    const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+    const inner = bracketContainer.querySelector('.bracket-layout');
+    const svgNS = 'http://www.w3.org/2000/svg';
+    
+    const svg = document.createElementNS(svgNS, 'svg');
     svg.classList.add('bracket-connector');
+    svg.setAttribute('width', layout.width);
+    svg.setAttribute('height', layout.height);
     svg.style.position = 'absolute';
     svg.style.top = '0';
     svg.style.left = '0';
-    svg.style.width = '100%';
-    svg.style.height = '100%';
     svg.style.pointerEvents = 'none';
     svg.style.zIndex = '1';
     
-    // Adjust for scroll position
-    const scrollLeft = window.pageXOffset || document.documentElement.scrollLeft;
-    const scrollTop = window.pageYOffset || document.documentElement.scrollTop;
-    
-    // Calculate start and end points
-    const startX = fromRect.right + scrollLeft;
-    const startY = fromRect.top + (fromRect.height / 2) + scrollTop;
-    
-    let endX = toRect.left + scrollLeft;
-    let endY;
-    
-    // Position 1 = top of card, Position 2 = bottom of card
-    if (position === '1') {
-        endY = toRect.top + (toRect.height * 0.25) + scrollTop;
-    } else {
-        endY = toRect.top + (toRect.height * 0.75) + scrollTop;
-    }
-    
-    // Calculate control points for curve
-    const midX = startX + (endX - startX) / 2;
-    
-    // Create path
-    const path = document.createElementNS('http://www.w3.org/2000/svg', 'path');
-    path.setAttribute('d', `M ${startX} ${startY} C ${midX} ${startY}, ${midX} ${endY}, ${endX} ${endY}`);
+    // One path element carries every connector
+    const path = document.createElementNS(svgNS, 'path');
+    path.setAttribute('d', layout.connectors.map(c => c.d).join(' '));
     path.setAttribute('stroke', 'var(--bs-info)');
     path.setAttribute('stroke-width', '2');
     path.setAttribute('fill', 'none');
     
     svg.appendChild(path);
-    document.body.appendChild(svg);
+    inner.appendChild(svg);
 }
 
 /**
@@ -56,6 +56,9 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // Autocomplete inputs backed by the search endpoints
+    document.querySelectorAll('[data-autocomplete-url]').forEach(initAutocomplete);
+    
     // Team search functionality
     const teamSearchInput = document.getElementById('teamSearch');
     if (teamSearchInput) {
@@ -92,3 +95,79 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 });
+
+/**
+ * Fetch matching names from the server as the user types and store the
+ * chosen id in the hidden input named by data-autocomplete-target
+ */
+function initAutocomplete(input) {
+    const hiddenInput = document.getElementById(input.dataset.autocompleteTarget);
+    const resultsList = input.parentElement.querySelector('.autocomplete-results');
+    const emptyMessage = input.parentElement.querySelector('.autocomplete-empty');
+    const excludeName = input.dataset.autocompleteExclude;
+    let debounceTimer = null;
+    let latestQuery = null;
+    
+    function showResults(results) {
+        resultsList.innerHTML = '';
+        results.forEach(function(result) {
+            const item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'list-group-item list-group-item-action';
+            item.textContent = result.name;
+            item.addEventListener('click', function() {
+                input.value = result.name;
+                hiddenInput.value = result.id;
+                resultsList.innerHTML = '';
+            });
+            resultsList.appendChild(item);
+        });
+        if (emptyMessage) {
+            emptyMessage.classList.toggle('d-none', results.length > 0 || input.value.trim() === '');
+        }
+    }
+    
+    input.addEventListener('input', function() {
+        // Typing invalidates any previous selection
+        hiddenInput.value = '';
+        clearTimeout(debounceTimer);
+        
+        debounceTimer = setTimeout(function() {
+            const query = input.value.trim();
+            latestQuery = query;
+            if (!query) {
+                showResults([]);
+                return;
+            }
+            
+            const url = new URL(input.dataset.autocompleteUrl, window.location.origin);
+            url.searchParams.set('q', query);
+            fetch(url)
+                .then(response => response.json())
+                .then(function(data) {
+                    // Ignore responses that arrive after a newer query was sent
+                    if (query !== latestQuery) return;
+                    showResults(data.results.filter(result => result.name !== excludeName));
+                });
+        }, 200);
+    });
+    
+    // A name must be picked from the list, not just typed
+    const form = input.closest('form');
+    if (form) {
+        form.addEventListener('submit', function(event) {
+            if (input.required && !hiddenInput.value) {
+                input.setCustomValidity('Please select an entry from the list.');
+            } else {
+                input.setCustomValidity('');
+            }
+            if (!input.checkValidity()) {
+                event.preventDefault();
+                input.reportValidity();
+            }
+        });
+        input.addEventListener('input', function() {
+            input.setCustomValidity('');
+        });
+    }
+}
@@ -0,0 +1,218 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = "X-Request-Id"
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has; anything else was passed in extra=
+_STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+_queue_handler = None
+
+
+def _parse_pairs(spec):
+    """Parse "name=value,name=value" into a dict, ignoring malformed entries."""
+    pairs = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tag records logged while handling a request with its id, method and path."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get("request_id")
+            record.method = request.method
+            record.path = request.path
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a configured fraction of each logger's records below WARNING."""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix first, so "request.slow" beats "request"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(f"{name}."):
+                return random.random() < rate
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records are dropped while the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record):
+        # Render the message and traceback now, on the logging thread, so the
+        # record no longer references arguments that may change or not pickle
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped > self._reported:
+            lost = self.dropped - self._reported
+            self._reported = self.dropped
+            try:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"Dropped {lost} log record(s) while the log queue was full"
+                }))
+            except queue.Full:
+                pass
+
+
+def _start_listener():
+    """Start the writer thread for this process; threads don't survive a fork."""
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, stream_handler)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def _stop_listener():
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()  # writes out whatever is still queued
+
+
+def configure_logging():
+    """
+    Route every record through a queue to a background JSON writer.
+
+    Settings are read from the environment here rather than at import, so
+    values from .env apply as long as it is loaded before this is called.
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    # Records waiting for the writer thread; when it falls this far behind new
+    # records are dropped rather than making request threads wait
+    queue_size = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+    # Fraction of records below WARNING kept per logger, e.g. "request=0.1"
+    sample = os.environ.get("LOG_SAMPLE", "")
+    # Root level, plus per-logger overrides such as "werkzeug=WARNING,utils=DEBUG".
+    # Our own access line replaces werkzeug's, so werkzeug only logs problems.
+    level = os.environ.get("LOG_LEVEL", "INFO")
+    levels = os.environ.get("LOG_LEVELS", "werkzeug=WARNING")
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+    _queue_handler.addFilter(RequestContextFilter())
+    rates = {}
+    for name, rate in _parse_pairs(sample).items():
+        try:
+            rates[name] = float(rate)
+        except ValueError:
+            continue
+    if rates:
+        _queue_handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+    for name, logger_level in _parse_pairs(levels).items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    _start_listener()
+    atexit.register(_stop_listener)
+
+
+def init_logging(app):
+    """
+    Give every request an id and log one structured line when it finishes.
+
+    Registered before the other hooks, so its after_request runs last and the
+    logged duration covers them (compression included).
+    """
+    configure_logging()
+    request_logger = logging.getLogger("request")
+
+    @app.before_request
+    def start_request_log():
+        _start_listener()
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex[:16]
+        g.request_log_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        started = g.get("request_log_started")
+        if started is None:
+            return response
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+        request_logger.info(
+            f"{request.method} {request.path} {response.status_code}",
+            extra={
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "bytes": response.content_length,
+            }
+        )
+        return response
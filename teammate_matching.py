@@ -0,0 +1,159 @@
+import random
+from datetime import datetime
+
+from id_allocator import next_id
+from ratings import initial_rating
+from utils import (
+    data_write_lock, get_matches, get_participants, get_team_ratings, get_teams,
+    group_participants_by_team, write_csv
+)
+
+# Teams are pairs; anyone flagged as needing a teammate whose team has fewer
+# members than this is waiting to be matched
+TEAM_SIZE = 2
+
+MATCHING_STRATEGIES = {
+    "random": "Random",
+    "balanced": "Balanced by rating",
+}
+
+
+def _registration_order(participant):
+    participant_id = participant["id"]
+    return (participant.get("created_at", ""), int(participant_id) if participant_id.isdigit() else 0)
+
+
+def waiting_participants(participants):
+    """Participants who asked for a teammate and still don't have one, earliest registered first."""
+    members_by_team = group_participants_by_team(participants)
+    waiting = [
+        p for p in participants
+        if str(p.get("needs_teammate", "")).lower() == "true"
+        and (not p["team_id"] or len(members_by_team.get(p["team_id"], [])) < TEAM_SIZE)
+    ]
+    return sorted(waiting, key=_registration_order)
+
+
+def participant_ratings(participants, team_ratings):
+    """A participant's rating is their current team's; teams that haven't played start at the average."""
+    unrated = initial_rating()
+    return {
+        p["id"]: team_ratings.get(p["team_id"], {}).get("rating", unrated)
+        for p in participants
+    }
+
+
+def parse_keep_apart(text):
+    """Pairs of participant ids that mustn't be matched, one "id, id" pair per line."""
+    pairs = set()
+    for line in text.splitlines():
+        ids = [part.strip().lstrip("#") for part in line.replace("/", ",").split(",") if part.strip()]
+        if len(ids) == 2 and ids[0] != ids[1]:
+            pairs.add(frozenset(ids))
+    return pairs
+
+
+def propose_pairs(waiting, strategy="random", ratings=None, keep_apart=(), rng=random):
+    """
+    Pair up waiting participants; return (pairs, unmatched).
+
+    "random" pairs them in a shuffled order. "balanced" pairs the strongest
+    remaining participant with the weakest, so the new teams come out as
+    even as possible. Either way each participant takes the first partner
+    in that order who isn't in a keep-apart pair with them; anyone left
+    without one stays waiting.
+    """
+    if strategy == "balanced":
+        ratings = ratings or {}
+        unrated = initial_rating()
+        # Highest first; registration order breaks ties
+        queue = sorted(waiting, key=lambda p: -ratings.get(p["id"], unrated))
+    else:
+        queue = list(waiting)
+        rng.shuffle(queue)
+
+    pairs, unmatched = [], []
+    while queue:
+        first = queue.pop(0)
+        # Balanced looks for a partner from the weak end, random from the front
+        candidates = reversed(range(len(queue))) if strategy == "balanced" else range(len(queue))
+        partner_index = next(
+            (i for i in candidates if frozenset((first["id"], queue[i]["id"])) not in keep_apart),
+            None
+        )
+        if partner_index is None:
+            unmatched.append(first)
+        else:
+            pairs.append((first, queue.pop(partner_index)))
+    return pairs, sorted(unmatched, key=_registration_order)
+
+
+def pair_team(pair, team_ids):
+    """(earlier registrant, later registrant, id of the team they'll share or "" for a new one)."""
+    first, second = sorted(pair, key=_registration_order)
+    team_id = next((m["team_id"] for m in (first, second) if m["team_id"] in team_ids), "")
+    return first, second, team_id
+
+
+def apply_pairs(pair_ids):
+    """
+    Put each pair of participant ids on one team, with one write per table.
+
+    The pair joins the team of whoever registered first; if neither has a
+    team, a "TBD" team is created for them to name later. Teams left empty
+    are removed unless they already played. Pairs where either participant
+    is no longer waiting (for example, matched by hand meanwhile) are
+    skipped. Returns (pairs applied, teams created, teams removed).
+    """
+    with data_write_lock():
+        # Re-read under the lock, so registrations made since the preview aren't lost
+        participants = get_participants()
+        teams = get_teams()
+        waiting = {p["id"]: p for p in waiting_participants(participants)}
+        team_ids = {team["id"] for team in teams}
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        applied, new_teams, vacated = 0, [], set()
+        for pair in pair_ids:
+            if len(set(pair)) != TEAM_SIZE or not all(pid in waiting for pid in pair):
+                continue
+            first, second, team_id = pair_team([waiting.pop(pid) for pid in pair], team_ids)
+            if not team_id:
+                team_id = next_id("teams")
+                new_teams.append({"id": team_id, "name": "TBD", "created_at": now})
+            for member in (first, second):
+                if member["team_id"] and member["team_id"] != team_id:
+                    vacated.add(member["team_id"])
+                member["team_id"] = team_id
+                member["needs_teammate"] = False
+            applied += 1
+
+        if not applied:
+            return 0, 0, 0
+
+        members_by_team = group_participants_by_team(participants)
+        played = {m[key] for m in get_matches() for key in ("team1_id", "team2_id")}
+        removed = {team_id for team_id in vacated
+                   if team_id not in members_by_team and team_id not in played}
+        teams = [team for team in teams if team["id"] not in removed] + new_teams
+
+        write_csv("data/participants.csv", participants)
+        if new_teams or removed:
+            write_csv("data/teams.csv", teams)
+    return applied, len(new_teams), len(removed)
+
+
+def matching_preview(strategy, keep_apart_text, rng=random):
+    """Waiting participants and the pairs (with the team each would share) the matcher would make."""
+    waiting = waiting_participants(get_participants())
+    team_ids = {team["id"] for team in get_teams()}
+    ratings = None
+    if strategy == "balanced":
+        ratings = participant_ratings(waiting, get_team_ratings())
+    pairs, unmatched = propose_pairs(waiting, strategy, ratings, parse_keep_apart(keep_apart_text), rng)
+    return {
+        "waiting": waiting,
+        "pairs": [pair_team(pair, team_ids) for pair in pairs],
+        "unmatched": unmatched,
+        "ratings": ratings or {},
+    }
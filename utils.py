@@ -1,68 +1,42 @@
 import os
 import csv
+import gc
+import json
+import logging
+import base64
+import bisect
 import random
+import shutil
 import math
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
 from datetime import datetime
 
+from snapshot import load_snapshot, save_snapshot
+from offset_index import carry_over_index, read_indexed_rows
+from data_versions import table_versions
+from match_journal import match_journal
+from ratings import initial_rating, posting_order, rating_engine
+from metrics import metrics, record_csv_read, record_csv_write
 
-def check_data_dir():
-    """Ensure data directory and CSV files exist."""
-    if not os.path.exists("data"):
-        os.makedirs("data")
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Parsed CSV tables keyed by file path. Each entry holds the change stamp of
+# the file it was parsed from, the rows and any indexes derived from them.
+_table_cache = {}
+_table_cache_lock = threading.Lock()
+
+# While a table's shared generation counter is unchanged, its file is only
+# stat()ed this often, to notice hand edits that bypass write_csv
+STAT_RECHECK_INTERVAL = 1.0
 
-    # Create participants.csv if it doesn't exist
-    if not os.path.exists("data/participants.csv"):
-        with open("data/participants.csv", "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["id", "first_name", "last_name", "team_id", "needs_teammate", "created_at"])
-    
-    # Check for existing participants file that needs to be updated
-    else:
-        # Read the first row to check the schema
-        with open("data/participants.csv", "r", newline="") as file:
-            reader = csv.reader(file)
-            header = next(reader, None)
-            if header and "needs_teammate" not in header:
-                # Create a backup
-                import shutil
-                shutil.copy2("data/participants.csv", "data/participants.csv.bak")
-                
-                # Read all data
-                file.seek(0)
-                data = list(reader)
-                
-                # Update with new schema
-                new_header = header + ["needs_teammate"]
-                
-                # Write data back with new schema
-                with open("data/participants.csv", "w", newline="") as outfile:
-                    writer = csv.writer(outfile)
-                    writer.writerow(new_header)
-                    for row in data[1:]:  # Skip header row
-                        # Default value for needs_teammate is False
-                        writer.writerow(row + ["False"])
-                        
-    # Create teams.csv if it doesn't exist
-    if not os.path.exists("data/teams.csv"):
-        with open("data/teams.csv", "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["id", "name", "created_at"])
-
-    # Create tournaments.csv if it doesn't exist
-    if not os.path.exists("data/tournaments.csv"):
-        with open("data/tournaments.csv", "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["id", "name", "type", "status", "created_at"])
-
-    # Create matches.csv if it doesn't exist
-    if not os.path.exists("data/matches.csv"):
-        with open("data/matches.csv", "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                "id", "tournament_id", "round", "match_number", 
-                "team1_id", "team2_id", "team1_score", "team2_score", 
-                "winner_id", "status", "next_match_id", "next_match_position"
-            ])
 
 def write_participants_csv(data, fieldnames=None):
     """Write participants data to CSV with specified field order."""
@@ -80,7 +54,7 @@ def write_participants_csv(data, fieldnames=None):
             writer.writeheader()
             writer.writerows(data)
     except Exception as e:
-        app.logger.error(f"Error writing participants CSV: {str(e)}")
+        logger.error(f"Error writing participants CSV: {str(e)}")
         raise
 
 def write_teams_csv(data, fieldnames=None):
@@ -99,7 +73,7 @@ def write_teams_csv(data, fieldnames=None):
             writer.writeheader()
             writer.writerows(data)
     except Exception as e:
-        app.logger.error(f"Error writing teams CSV: {str(e)}")
+        logger.error(f"Error writing teams CSV: {str(e)}")
         raise
 
 def read_csv(file_path):
@@ -125,55 +99,652 @@ def read_csv(file_path):
             except UnicodeDecodeError:
                 continue
             except Exception as e:
-                print(f"Error with encoding {encoding}: {e}")
+                logger.warning(f"Error with encoding {encoding}: {e}")
                 continue
                 
         if data is None:
-            print(f"Could not read file with any encoding: {file_path}")
+            logger.error(f"Could not read file with any encoding: {file_path}")
             return []
-            
+        
+        record_csv_read(file_path)
         return data
     except Exception as e:
-        print(f"Error reading CSV {file_path}: {e}")
+        logger.error(f"Error reading CSV {file_path}: {e}")
         return []
 
+def read_csv_header(file_path):
+    """Return the header row of a CSV file, or None if it is missing or empty."""
+    try:
+        with open(file_path, "r", newline="", encoding="utf-8-sig") as file:
+            return next(csv.reader(file), None)
+    except (OSError, UnicodeDecodeError):
+        return None
+
 def write_csv(file_path, data):
-    """Write list of dictionaries to CSV file with consistent encoding."""
+    """Write list of dictionaries to CSV file with consistent encoding; return whether it was written."""
     if not data:
-        return
+        return False
 
+    # Write to a temporary file and rename it over the original, so readers
+    # (and open download streams) always see either the old or the new file
+    tmp_path = f"{file_path}.tmp"
     try:
-        with open(file_path, "w", newline="", encoding="utf-8") as file:
-            # Ensure all keys are included
-            all_keys = set()
-            for row in data:
-                all_keys.update(row.keys())
-                
-            writer = csv.DictWriter(file, fieldnames=list(all_keys))
-            writer.writeheader()
-            writer.writerows(data)
+        with data_write_lock():
+            with open(tmp_path, "w", newline="", encoding="utf-8") as file:
+                # Ensure all keys are included
+                all_keys = set()
+                for row in data:
+                    all_keys.update(row.keys())
+                    
+                writer = csv.DictWriter(file, fieldnames=list(all_keys))
+                writer.writeheader()
+                writer.writerows(data)
+            os.replace(tmp_path, file_path)
+            stamp = data_version(file_path)
+            generation = table_versions.bump(file_path)
+        record_csv_write(stamp[0][1] if stamp[0] else 0)
     except Exception as e:
-        print(f"Error writing CSV {file_path}: {e}")
+        logger.error(f"Error writing CSV {file_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with _table_cache_lock:
+            _table_cache.pop(file_path, None)
+        return False
+
+    # Keep the cache warm with what was just written, exactly as read_csv
+    # would have parsed it back, so the next request doesn't re-read the file
+    rows = [
+        {key: "" if row.get(key) is None else str(row.get(key)).strip() for key in all_keys}
+        for row in data
+    ]
+    _store_table(file_path, stamp, rows, generation)
+    _save_snapshot_in_background(file_path, stamp, rows)
+    return True
+
+
+def append_csv(file_path, data):
+    """
+    Add rows to the end of a CSV file, keeping its existing column order.
+
+    The file is copied byte for byte, the new rows are appended to the copy
+    and the copy is renamed over the original, so like write_csv it is
+    replaced atomically. Unlike write_csv no existing row is re-encoded, and
+    the file's offset index and the cached table are extended instead of
+    rebuilt. Falls back to rewriting the whole file when the rows bring new
+    columns.
+    """
+    if not data:
+        return
+
+    new_keys = {key for row in data for key in row}
+    tmp_path = f"{file_path}.tmp"
+    with data_write_lock():
+        header = read_csv_header(file_path)
+        if not header or not new_keys.issubset(header):
+            # Still under the lock, so no concurrent append is lost
+            write_csv(file_path, table_rows(file_path) + list(data))
+            return
+
+        previous_stamp = data_version(file_path)
+        try:
+            previous_stat = os.stat(file_path)
+            shutil.copyfile(file_path, tmp_path)
+            with open(tmp_path, "rb") as file:
+                # Start on a fresh line if the file was saved without a final newline
+                file.seek(0, os.SEEK_END)
+                needs_newline = False
+                if file.tell() > 0:
+                    file.seek(-1, os.SEEK_END)
+                    needs_newline = file.read(1) != b"\n"
+
+            with open(tmp_path, "a", newline="", encoding="utf-8") as file:
+                if needs_newline:
+                    file.write("\r\n")
+                writer = csv.DictWriter(file, fieldnames=header, restval="")
+                writer.writerows(data)
+            os.replace(tmp_path, file_path)
+            carry_over_index(file_path, previous_stat, os.stat(file_path))
+            stamp = data_version(file_path)
+            generation = table_versions.bump(file_path)
+            if stamp[0] and previous_stamp[0]:
+                record_csv_write(stamp[0][1] - previous_stamp[0][1])
+        except Exception as e:
+            logger.error(f"Error appending to CSV {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with _table_cache_lock:
+                _table_cache.pop(file_path, None)
+            return
+
+    # Extend the cached rows only if they were exactly the file before the append
+    entry = _table_cache.get(file_path)
+    if entry is not None and entry["stamp"] == previous_stamp:
+        rows = entry["rows"] + [
+            {key: "" if row.get(key) is None else str(row.get(key)).strip() for key in header}
+            for row in data
+        ]
+        _store_table(file_path, stamp, rows, generation)
+        _save_snapshot_in_background(file_path, stamp, rows)
+
+
+def _save_snapshot_in_background(file_path, stamp, rows):
+    # Encoding a large table takes a while; keep it off the request path
+    threading.Thread(target=save_snapshot, args=(file_path, stamp, rows), daemon=True).start()
+
+
+def _store_table(file_path, stamp, rows, generation=None):
+    entry = {
+        "stamp": stamp,
+        "generation": generation,
+        "checked_at": time.monotonic(),
+        "rows": rows,
+        "indexes": {}
+    }
+    with _table_cache_lock:
+        _table_cache[file_path] = entry
+    return entry
+
+
+def load_table(file_path):
+    """Return the cache entry for a CSV file, re-parsing it only if it changed on disk."""
+    # Read the generation and stat before reading, so a write racing with
+    # the read leaves a stale stamp behind and is simply picked up next time
+    generation = table_versions.get(file_path)
+    entry = _table_cache.get(file_path)
+    now = time.monotonic()
+    if (entry is not None and generation is not None and entry["generation"] == generation
+            and now - entry["checked_at"] < STAT_RECHECK_INTERVAL):
+        metrics.record_cache("table", True)
+        return entry
+
+    stamp = data_version(file_path)
+    if entry is not None and entry["stamp"] == stamp:
+        entry["generation"] = generation
+        entry["checked_at"] = now
+        metrics.record_cache("table", True)
+        return entry
+
+    metrics.record_cache("table", False)
+    if None in stamp:
+        return _store_table(file_path, stamp, [], generation)
+    # A binary snapshot of this exact file version skips CSV parsing
+    rows = load_snapshot(file_path, stamp)
+    metrics.record_cache("snapshot", rows is not None)
+    if rows is None:
+        rows = read_csv(file_path)
+        _save_snapshot_in_background(file_path, stamp, rows)
+    return _store_table(file_path, stamp, rows, generation)
+
+
+def preload_tables():
+    """
+    Load every table and its common indexes into the cache, then freeze them.
+
+    Meant to run in the gunicorn master before workers are forked (see
+    main.py), so workers share the parsed data copy-on-write. gc.freeze()
+    moves everything loaded so far out of the collector's reach, so garbage
+    collection in the workers doesn't write to (and copy) those pages.
+    """
+    for file_path in ["data/participants.csv", "data/teams.csv", "data/tournaments.csv", "data/matches.csv"]:
+        load_table(file_path)
+    table_index("data/tournaments.csv", "created_at", _build_tournament_index)
+    table_index("data/participants.csv", "normalized_name", _build_participant_name_index)
+    table_index("data/teams.csv", "normalized_name", _build_team_name_index)
+
+    gc.collect()
+    gc.freeze()
+
+
+def table_index(file_path, name, builder):
+    """Return an index built by builder(rows), rebuilt only when the table changes."""
+    entry = load_table(file_path)
+    index = entry["indexes"].get(name)
+    if index is None:
+        index = builder(entry["rows"])
+        entry["indexes"][name] = index
+    return index
+
+
+def table_rows(file_path):
+    """Return copies of a table's rows so callers can modify them freely."""
+    return [dict(row) for row in load_table(file_path)["rows"]]
+
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_held_locks = threading.local()
+
+
+@contextmanager
+def file_lock(lock_path):
+    """
+    Exclusive lock shared by all threads and worker processes using lock_path.
+
+    The lock is re-entrant within a thread, so a helper that takes it can be
+    called from code that already holds it.
+    """
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(lock_path, threading.RLock())
+
+    with thread_lock:
+        depths = _held_locks.__dict__.setdefault("depths", {})
+        if depths.get(lock_path):
+            depths[lock_path] += 1
+            try:
+                yield
+            finally:
+                depths[lock_path] -= 1
+            return
+
+        depths[lock_path] = 1
+        try:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+            with open(lock_path, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            depths[lock_path] = 0
+
+
+def data_write_lock():
+    """Lock serializing rewrites of the data files across threads and workers."""
+    return file_lock("data/.write.lock")
+
+
+def data_version(*file_paths):
+    """Cheap change stamp for data files, based on their size and mtime."""
+    stamp = []
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
 
 
 def get_participants():
     """Get all participants from CSV."""
-    return read_csv("data/participants.csv")
+    return table_rows("data/participants.csv")
 
 
 def get_teams():
     """Get all teams from CSV."""
-    return read_csv("data/teams.csv")
+    return table_rows("data/teams.csv")
 
 
 def get_tournaments():
     """Get all tournaments from CSV."""
-    return read_csv("data/tournaments.csv")
+    return table_rows("data/tournaments.csv")
 
 
 def get_matches():
-    """Get all matches from CSV."""
-    return read_csv("data/matches.csv")
+    """Get all matches from CSV, with the changes recorded in the match journal."""
+    return _apply_match_journal(table_rows("data/matches.csv"))
+
+
+def _apply_match_journal(matches):
+    overlay = match_journal.overlay()
+    if overlay:
+        for match in matches:
+            changes = overlay.get(match["id"])
+            if changes:
+                match.update(changes)
+    return matches
+
+
+def record_match_events(events, by=""):
+    """
+    Record match changes in the journal instead of rewriting matches.csv.
+
+    Each event is (type, match_id, changes). The previous values of the
+    changed fields are stored alongside, so earlier states of a tournament
+    can be rebuilt. Compacts the journal into matches.csv when it is due.
+    """
+    with data_write_lock():
+        journal_events = []
+        for event_type, match_id, changes in events:
+            match = get_match_by_id(match_id)
+            if not match:
+                continue
+            journal_events.append({
+                "type": event_type,
+                "match_id": match_id,
+                "tournament_id": match["tournament_id"],
+                "set": changes,
+                "before": {field: match.get(field) or "" for field in changes}
+            })
+        recorded = match_journal.append(journal_events, by=by)
+
+        # Ratings follow each result as it is posted; a failure here must
+        # not lose the score, which is already in the journal
+        try:
+            _sync_team_ratings()
+        except Exception as e:
+            logger.error(f"Error updating team ratings: {e}")
+
+        if match_journal.needs_compaction():
+            compact_match_journal()
+    return recorded
+
+
+def compact_match_journal():
+    """Fold the journal's pending changes into matches.csv and archive it."""
+    with data_write_lock():
+        if not match_journal.pending_events():
+            return
+        # Archiving the journal without the new matches.csv would lose its scores
+        if not write_csv("data/matches.csv", get_matches()):
+            logger.error("Match journal not compacted: matches.csv could not be written")
+            return
+        match_journal.rotate()
+
+
+class JournalCompactor(threading.Thread):
+    """
+    Daemon thread compacting the journal once its oldest event is old enough.
+
+    Score entry only checks the thresholds when it records something, so
+    without this a journal left pending when scoring stops would never be
+    compacted on age.
+    """
+
+    def __init__(self, interval=60):
+        super().__init__(name="journal-compactor", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if match_journal.needs_compaction():
+                    compact_match_journal()
+            except Exception as e:
+                logger.error(f"Scheduled journal compaction failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_journal_compactor_pid = None
+
+
+def init_journal_compaction(app):
+    """Run the journal compactor in each worker process once it serves requests."""
+
+    @app.before_request
+    def ensure_journal_compactor():
+        # Threads don't survive fork, so each worker starts its own; only the
+        # first to take the write lock finds anything left to compact
+        global _journal_compactor_pid
+        if _journal_compactor_pid != os.getpid():
+            _journal_compactor_pid = os.getpid()
+            JournalCompactor().start()
+
+
+def _sync_team_ratings():
+    """
+    Bring the rating engine up to date with the journal.
+
+    Loads the persisted ratings on first use and applies only the events
+    recorded after their high-water mark. A correction changes a result that
+    was already counted, so it triggers a full replay instead. Ratings whose
+    stamp doesn't match the journal (e.g. after a backup was restored) are
+    rebuilt too. Callers must hold the data write lock.
+    """
+    with rating_engine.lock:
+        last_seq = match_journal.last_seq()
+        if rating_engine.ratings is not None and rating_engine.high_water == last_seq:
+            return
+
+        if (not (rating_engine.ratings is not None or rating_engine.load())
+                or rating_engine.high_water > last_seq
+                or rating_engine.stamp != _journal_stamp(rating_engine.high_water)):
+            # No usable ratings, or ones that belong to a different journal
+            _rebuild_team_ratings(last_seq)
+            return
+        if rating_engine.high_water == last_seq:
+            return
+
+        for event in match_journal.events_since(rating_engine.high_water):
+            if event["type"] == "correction":
+                _rebuild_team_ratings(last_seq)
+                return
+            if event["type"] == "score_set":
+                match = get_match_by_id(event["match_id"])
+                if match:
+                    rating_engine.apply(dict(match, **event["set"]))
+        rating_engine.high_water = last_seq
+        rating_engine.stamp = _journal_stamp(last_seq)
+        rating_engine.save()
+
+
+def _journal_stamp(seq):
+    """What identifies journal event seq, to store alongside ratings current to it."""
+    event = match_journal.event(seq) if seq else None
+    return [event["at"], event["match_id"]] if event else None
+
+
+def _rebuild_team_ratings(last_seq):
+    """
+    Replay every completed match in the order its result was posted.
+
+    This is the order the incremental updates apply results in, so a
+    rebuild after a correction gives what they would have given had the
+    corrected result been posted. It reads the whole journal history,
+    archives included.
+    """
+    posted = {}
+    for event in match_journal.history():
+        if event["type"] == "score_set":
+            posted.setdefault(event["match_id"], event["seq"])
+    ordered = posting_order(get_matches(), get_tournaments(), posted)
+    rating_engine.rebuild(ordered, last_seq, _journal_stamp(last_seq))
+    rating_engine.save()
+
+
+def get_team_ratings():
+    """Elo rating, games played and W/L/D of every team that has played, by team id."""
+    if rating_engine.ratings is None or rating_engine.high_water != match_journal.last_seq():
+        with data_write_lock():
+            _sync_team_ratings()
+    with rating_engine.lock:
+        return {team_id: dict(team) for team_id, team in rating_engine.ratings.items()}
+
+
+def get_match_history(match_id):
+    """Every recorded change to a match, oldest first."""
+    return match_journal.history(match_id=match_id)
+
+
+def get_tournament_matches_as_of(tournament_id, seq):
+    """A tournament's matches as they were right after journal event seq."""
+    matches = get_tournament_matches(tournament_id)
+    by_id = index_by_id(matches)
+    # Undo the changes made after seq, newest first
+    for event in reversed(match_journal.history(tournament_id=tournament_id, after=seq)):
+        match = by_id.get(event["match_id"])
+        if match:
+            match.update(event["before"])
+    return matches
+
+
+def index_by_id(rows):
+    """Map each row's id to the row."""
+    return {row["id"]: row for row in rows}
+
+
+def group_participants_by_team(participants):
+    """Group participants by team_id in a single pass; unassigned ones are under ""."""
+    groups = {}
+    for participant in participants:
+        groups.setdefault(participant.get("team_id") or "", []).append(participant)
+    return groups
+
+
+def normalize_name(*parts):
+    """
+    Normalized form of a name for duplicate detection.
+
+    Applies Unicode NFKC normalization and casefolding and collapses runs of
+    whitespace, so "Ann  Lee", "ann lee" and "ＡＮＮ LEE" all compare equal.
+    """
+    text = unicodedata.normalize("NFKC", " ".join(part or "" for part in parts))
+    return " ".join(text.casefold().split())
+
+
+def _build_participant_name_index(rows):
+    index = {}
+    for row in rows:
+        index.setdefault(normalize_name(row.get("first_name"), row.get("last_name")), row)
+    return index
+
+
+def _build_team_name_index(rows):
+    index = {}
+    for row in rows:
+        index.setdefault(normalize_name(row.get("name")), row)
+    return index
+
+
+def find_participant_by_name(first_name, last_name):
+    """Get the participant registered under a name, ignoring case and spacing."""
+    index = table_index("data/participants.csv", "normalized_name", _build_participant_name_index)
+    participant = index.get(normalize_name(first_name, last_name))
+    return dict(participant) if participant else None
+
+
+def find_team_by_name(name):
+    """Get the team with a name, ignoring case and spacing."""
+    index = table_index("data/teams.csv", "normalized_name", _build_team_name_index)
+    team = index.get(normalize_name(name))
+    return dict(team) if team else None
+
+
+def _build_participant_prefix_index(rows):
+    """Sorted (name key, id) arrays for prefix search, over all and unassigned participants."""
+    entries = []
+    available = []
+    for row in rows:
+        name = f"{row.get('first_name', '')} {row.get('last_name', '')}".strip()
+        # Index both "first last" and "last first" so either name can be typed first
+        keys = {normalize_name(row.get("first_name"), row.get("last_name")),
+                normalize_name(row.get("last_name"), row.get("first_name"))}
+        for key in keys:
+            entry = (key, row["id"], name)
+            entries.append(entry)
+            if not row.get("team_id"):
+                available.append(entry)
+    entries.sort()
+    available.sort()
+    return {"all": entries, "available": available}
+
+
+def _build_team_prefix_index(rows):
+    return sorted((normalize_name(row.get("name")), row["id"], row.get("name", "")) for row in rows)
+
+
+def _prefix_search(entries, prefix, limit):
+    """Walk a sorted (key, id, name) array from the first key >= prefix."""
+    results = []
+    seen = set()
+    position = bisect.bisect_left(entries, (prefix,))
+    while position < len(entries) and len(results) < limit:
+        key, row_id, name = entries[position]
+        if not key.startswith(prefix):
+            break
+        if row_id not in seen:
+            seen.add(row_id)
+            results.append({"id": row_id, "name": name})
+        position += 1
+    return results
+
+
+def search_participants(query, limit=10, available_only=False):
+    """Participants whose first or last name starts with query, up to limit results."""
+    index = table_index("data/participants.csv", "name_prefix", _build_participant_prefix_index)
+    entries = index["available"] if available_only else index["all"]
+    return _prefix_search(entries, normalize_name(query), limit)
+
+
+def search_teams(query, limit=10):
+    """Teams whose name starts with query, up to limit results."""
+    entries = table_index("data/teams.csv", "name_prefix", _build_team_prefix_index)
+    return _prefix_search(entries, normalize_name(query), limit)
+
+
+TOURNAMENT_STATUSES = ["pending", "active", "completed"]
+
+
+def _build_tournament_index(rows):
+    """Sort keys by creation date, per status, plus counts for the dashboard."""
+    by_key = {}
+    by_status = {status: [] for status in TOURNAMENT_STATUSES}
+    for row in rows:
+        key = (row.get("created_at", ""), row.get("id", ""))
+        by_key[key] = row
+        by_status.setdefault(row.get("status", ""), []).append(key)
+
+    for keys in by_status.values():
+        keys.sort()
+
+    return {
+        "keys": sorted(by_key),
+        "by_status": by_status,
+        "by_key": by_key,
+        "counts": {status: len(keys) for status, keys in by_status.items()}
+    }
+
+
+def _encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    try:
+        created_at, tournament_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (str(created_at), str(tournament_id))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+
+
+def get_tournaments_page(status=None, cursor=None, limit=20):
+    """
+    Return (tournaments, next_cursor) ordered by creation date, newest first.
+
+    The cursor is the position of the last tournament on the previous page,
+    so a page is a bisect into the sorted created_at index plus a slice.
+    """
+    index = table_index("data/tournaments.csv", "created_at", _build_tournament_index)
+    keys = index["by_status"].get(status, []) if status else index["keys"]
+
+    end = len(keys)
+    if cursor:
+        key = _decode_cursor(cursor)
+        if key is not None:
+            end = bisect.bisect_left(keys, key)
+
+    start = max(0, end - limit)
+    page = [dict(index["by_key"][key]) for key in reversed(keys[start:end])]
+    next_cursor = _encode_cursor(keys[start]) if start > 0 else None
+    return page, next_cursor
+
+
+def get_table_counts():
+    """Row counts for the dashboard, served from the table cache."""
+    tournament_index = table_index("data/tournaments.csv", "created_at", _build_tournament_index)
+    return {
+        "participants": len(load_table("data/participants.csv")["rows"]),
+        "teams": len(load_table("data/teams.csv")["rows"]),
+        "tournaments": len(tournament_index["keys"]),
+        "tournaments_by_status": dict(tournament_index["counts"])
+    }
 
 
 def get_team_by_id(team_id):
@@ -204,27 +775,50 @@ def get_tournament_by_id(tournament_id):
 
 
 def get_match_by_id(match_id):
-    """Get match by ID."""
-    matches = get_matches()
-    for match in matches:
-        if match["id"] == match_id:
-            return match
-    return None
+    """Get match by ID, decoding only its own row of matches.csv."""
+    rows = read_indexed_rows("data/matches.csv", "id", ["tournament_id"], key=match_id)
+    if rows is None:
+        return next((match for match in get_matches() if match["id"] == match_id), None)
+    return _apply_match_journal(rows)[0] if rows else None
+
 
+def get_tournament_matches(tournament_id):
+    """Get a tournament's matches, decoding only their rows of matches.csv."""
+    rows = read_indexed_rows("data/matches.csv", "id", ["tournament_id"],
+                             group=("tournament_id", tournament_id))
+    if rows is None:
+        return [match for match in get_matches() if match["tournament_id"] == tournament_id]
+    return _apply_match_journal(rows)
 
-def generate_tournament_bracket(tournament_id, tournament_type, team_ids):
-    """Generate tournament bracket based on tournament type."""
+
+def generate_tournament_bracket(tournament_id, tournament_type, team_ids, ratings=None):
+    """
+    Generate tournament bracket based on tournament type.
+
+    With ratings (team id -> rating), elimination brackets are seeded so the
+    strongest teams meet as late as possible and get any byes; without them
+    teams are placed at random.
+    """
     if tournament_type == "single_elimination":
-        return generate_single_elimination_bracket(tournament_id, team_ids)
+        return generate_single_elimination_bracket(tournament_id, team_ids, ratings)
     elif tournament_type == "double_elimination":
-        return generate_double_elimination_bracket(tournament_id, team_ids)
+        return generate_double_elimination_bracket(tournament_id, team_ids, ratings)
     elif tournament_type == "round_robin":
         return generate_round_robin_bracket(tournament_id, team_ids)
     else:
         return []
 
 
-def generate_single_elimination_bracket(tournament_id, team_ids):
+def seed_positions(slots):
+    """Seed numbers in bracket order, e.g. 8 slots -> 1, 8, 4, 5, 2, 7, 3, 6."""
+    order = [1]
+    while len(order) < slots:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+def generate_single_elimination_bracket(tournament_id, team_ids, ratings=None):
     """Generate single elimination tournament bracket."""
     matches = []
     team_count = len(team_ids)
@@ -237,10 +831,18 @@ def generate_single_elimination_bracket(tournament_id, team_ids):
     shuffled_teams = team_ids.copy()
     random.shuffle(shuffled_teams)
     
-    # Add byes if needed
-    byes_needed = total_slots - team_count
-    for i in range(byes_needed):
-        shuffled_teams.append("")
+    if ratings is not None:
+        # Highest rated first; the shuffle above breaks ties (e.g. new teams)
+        unrated = initial_rating()
+        seeds = sorted(shuffled_teams, key=lambda t: ratings.get(t, unrated), reverse=True)
+        # Seeds past the team count are byes, so they fall to the top seeds
+        shuffled_teams = [seeds[seed - 1] if seed <= team_count else ""
+                          for seed in seed_positions(total_slots)]
+    else:
+        # Add byes if needed
+        byes_needed = total_slots - team_count
+        for i in range(byes_needed):
+            shuffled_teams.append("")
     
     # Create matches for first round
     first_round_matches = []
@@ -326,7 +928,7 @@ def generate_single_elimination_bracket(tournament_id, team_ids):
     return matches
 
 
-def generate_double_elimination_bracket(tournament_id, team_ids):
+def generate_double_elimination_bracket(tournament_id, team_ids, ratings=None):
     """
     Generate double elimination tournament bracket.
     This is a simplified version that creates a winners and losers bracket.
@@ -334,7 +936,7 @@ def generate_double_elimination_bracket(tournament_id, team_ids):
     matches = []
     # For simplicity, use single elimination implementation for now
     # In a real implementation, you'd create both a winners and losers bracket
-    return generate_single_elimination_bracket(tournament_id, team_ids)
+    return generate_single_elimination_bracket(tournament_id, team_ids, ratings)
 
 
 def generate_round_robin_bracket(tournament_id, team_ids):